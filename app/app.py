@@ -1,48 +1,484 @@
+import datetime
+import functools
+import json
+import logging
+import os
+import threading
+import time
 from urllib.parse import unquote
 
+import click
+from backends import get_backend
+from backends import QueryTimeout
+from backends import sparql_literal
+from backends import values_clause
+from caching import code_version
+from caching import LastResults
+from caching import MISSING
+from caching import PageCache
+from caching import SharedCache
+from caching import SingleFlight
+from caching import validators
+from compression import best_encoding
+from compression import encode_json
+from export import export_lines
+from export import FORMATS
+from export import write_snapshot
+from flask import abort
 from flask import Flask
+from flask import g
+from flask import jsonify
 from flask import render_template
 from flask import request
+from flask import Response
+from flask import send_from_directory
+from flask import url_for
+from indexes import AgreementIndex
+from indexes import DataVersion
+from indexes import EntityIndex
+from indexes import SearchIndex
+from results import Column
+from results import ResultSet
 from SPARQLWrapper import JSON
 from SPARQLWrapper import SPARQLWrapper
+from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
+from werkzeug.exceptions import ServiceUnavailable
 
 app = Flask(__name__)
+app.config.from_mapping(
+    # 'graphdb' to query SPARQL_ENDPOINT, or 'embedded' to load the
+    # comma separated RDF files in SPARQL_DATASET into the app itself
+    SPARQL_BACKEND=os.environ.get('SPARQL_BACKEND', 'graphdb'),
+    SPARQL_DATASET=os.environ.get('SPARQL_DATASET', ''),
+    # The SPARQL endpoint of the GraphDB repository
+    SPARQL_ENDPOINT=os.environ.get(
+        'SPARQL_ENDPOINT',
+        os.environ.get('GRAPHDB_URL', 'http://graphdb:7200')
+        + '/repositories/tk_kb',
+    ),
+    # Set to an empty string to disable the Wikidata lookups
+    WIKIDATA_ENDPOINT=os.environ.get(
+        'WIKIDATA_ENDPOINT', 'https://query.wikidata.org/sparql',
+    ),
+    # How long (in seconds) the queries of a page may take, and those that
+    # stream all the data (to build the indexes and the exports)
+    QUERY_TIMEOUT=float(os.environ.get('QUERY_TIMEOUT', 30)),
+    STREAM_QUERY_TIMEOUT=float(os.environ.get('STREAM_QUERY_TIMEOUT', 600)),
+    # The number of query results kept to fall back on when a query times
+    # out
+    LAST_RESULTS_SIZE=int(os.environ.get('LAST_RESULTS_SIZE', 1024)),
+    # The number of requests per worker that may run the queries of each
+    # of the expensive pages at the same time, the others are turned away
+    EXPENSIVE_ROUTE_CONCURRENCY=int(
+        os.environ.get('EXPENSIVE_ROUTE_CONCURRENCY', 2),
+    ),
+    # How often (in seconds) to check whether the scraper changed the data
+    DATA_VERSION_CHECK_INTERVAL=float(
+        os.environ.get('DATA_VERSION_CHECK_INTERVAL', 30),
+    ),
+    # The number of rendered pages kept of the heavy pages, and after how
+    # many seconds they are rendered again if the data did not change
+    PAGE_CACHE_SIZE=int(os.environ.get('PAGE_CACHE_SIZE', 256)),
+    PAGE_CACHE_MAX_AGE=float(os.environ.get('PAGE_CACHE_MAX_AGE', 3600)),
+    # A SQLite file to share cached query results, indexes and pages
+    # between the worker processes (see gunicorn.conf.py), empty to not
+    # cache them across processes (or requests, for query results)
+    SHARED_CACHE_PATH=os.environ.get('SHARED_CACHE_PATH', ''),
+    SHARED_CACHE_MAX_AGE=float(os.environ.get('SHARED_CACHE_MAX_AGE', 3600)),
+    # Where `flask export-snapshots` writes the compressed exports
+    EXPORT_DIR=os.environ.get(
+        'EXPORT_DIR', os.path.join(os.path.dirname(__file__), 'exports'),
+    ),
+)
+
+
+app_code_version = code_version(app.root_path)
+
+shared_cache = (
+    SharedCache(
+        app.config['SHARED_CACHE_PATH'],
+        app.config['SHARED_CACHE_MAX_AGE'],
+        namespace=app_code_version,
+    )
+    if app.config['SHARED_CACHE_PATH'] else None
+)
+
+# Identical queries that run at the same time (e.g. when many users open
+# the same page) are only sent to the database once
+in_flight_queries = SingleFlight()
+# When a query times out its last results are used instead
+last_results = LastResults(app.config['LAST_RESULTS_SIZE'])
+
+# The seconds after which clients can try again when a page could not be
+# served (Retry-After)
+RETRY_AFTER = 30
+
+# The Wikidata lookups are only extra information on the pages
+WIKIDATA_TIMEOUT = 10
+
+
+def query_database(query):
+    """The results of a query, always from the database itself."""
+
+    return get_backend(app).query(query)
+
+
+def run_query(key, run):
+    """
+    Run a query once for all concurrent callers, and with a shared cache
+    once per data version for all workers. If it times out, return its
+    last results (of any data version) if there are any.
+    """
+
+    try:
+        if shared_cache is None:
+            results = in_flight_queries.do(key, run)
+        else:
+            results = in_flight_queries.do(
+                key,
+                lambda: shared_cache.fetch(key, data_version.current(), run),
+            )
+    except QueryTimeout as e:
+        results = last_results.get(key)
+        if results is MISSING:
+            raise
+        logging.warning(f'{e}, using the last results of the query')
+        # The page is not that of the current data version
+        g.from_last_results = True
+        return results
+
+    last_results.set(key, results)
+    return results
 
 
 def get_db_results(query):
-    """Get results from the GraphDB database."""
+    """
+    Get results from the GraphDB database (or the embedded store). The
+    results can be shared with other callers, so don't modify them.
+    """
 
-    # Docker Compose setup (uncomment when using Docker)
-    sparql = SPARQLWrapper('http://graphdb:7200/repositories/tk_kb')
+    return run_query(('results', query), lambda: query_database(query))
 
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
 
-    return sparql.query().convert()
+def get_db_rows(query, variables, timeout=None):
+    """
+    Stream the results of a query as tuples of the values of `variables`,
+    for queries with large results (by default with the longer
+    STREAM_QUERY_TIMEOUT).
+    """
+
+    return get_backend(app).rows(
+        query, variables, timeout or app.config['STREAM_QUERY_TIMEOUT'],
+    )
+
+
+def get_db_columns(query, schema):
+    """
+    The results of a query as a `ResultSet`, decoded into typed columns by
+    `schema` ({variable: Column}). Shared like those of `get_db_results`.
+    """
+
+    return run_query(
+        ('columns', query, tuple(schema.items())),
+        lambda: ResultSet.from_rows(
+            schema,
+            get_db_rows(query, list(schema), app.config['QUERY_TIMEOUT']),
+        ),
+    )
+
+
+data_version = DataVersion(
+    query_database, app.config['DATA_VERSION_CHECK_INTERVAL'],
+)
+entity_index = EntityIndex(get_db_rows, data_version, shared_cache)
+agreement_index = AgreementIndex(get_db_rows, data_version, shared_cache)
+search_index = SearchIndex(get_db_rows, data_version, shared_cache)
+
+# The pages only change when the scraper uploads data (or the app is
+# updated), so they get validators derived from the data version and
+# browsers and proxies can revalidate them without running any queries.
+# The Cache-Control of a page by endpoint, the others are always
+# revalidated.
+CACHE_CONTROL = {
+    'index': 'public, max-age=300',
+    'agreement': 'public, max-age=300',
+    'fracties': 'public, max-age=300',
+    'autocomplete': 'public, max-age=300',
+    'chart_data': 'public, max-age=300',
+}
+DEFAULT_CACHE_CONTROL = 'public, no-cache'
+# Served with their own validators
+UNVALIDATED_ENDPOINTS = {'static', 'export_snapshot'}
+
+page_cache = PageCache(
+    app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_MAX_AGE'],
+    shared_cache,
+)
+
+
+class OutdatedPage(Exception):
+    """A page that was rendered with the last results of a query."""
+
+    def __init__(self, page):
+        super().__init__('The page was rendered with outdated results')
+        self.page = page
+
+
+def cached_page(view):
+    """
+    Serve the last rendered version of a page (per URL) and render it
+    again in the background when the data changed. Until then the page is
+    sent with the validators of the data version it was rendered for, and
+    always revalidated. Pages rendered with the last results of a query
+    that timed out are not kept.
+    """
+
+    @functools.wraps(view)
+    def cached_view(**kwargs):
+        path = request.full_path
+
+        def render():
+            with app.test_request_context(path):
+                page = view(**kwargs)
+                if g.get('from_last_results'):
+                    raise OutdatedPage(page)
+                return page
+
+        version = data_version.current()
+        try:
+            page, rendered_version = page_cache.get(path, version, render)
+        except OutdatedPage as e:
+            g.from_last_results = True
+            return e.page
+        if rendered_version != version:
+            if rendered_version is None:
+                g.pop('etag', None)
+                g.cache_control = 'no-store'
+            else:
+                g.etag, g.last_modified = validators(
+                    app_code_version, rendered_version,
+                )
+                g.cache_control = DEFAULT_CACHE_CONTROL
+        return page
+
+    return cached_view
+
+
+def limit_concurrency(view):
+    """
+    Run the view for at most EXPENSIVE_ROUTE_CONCURRENCY requests at a
+    time (per value of its arguments, e.g. per chart), and answer the
+    others right away with a 503 instead of letting them wait for the
+    database (and take up the threads of the worker). Below `cached_page`
+    only the requests that have to render the page count, the others are
+    served the cached version.
+    """
+
+    all_slots = {}
+    lock = threading.Lock()
+
+    @functools.wraps(view)
+    def limited_view(**kwargs):
+        with lock:
+            slots = all_slots.setdefault(
+                tuple(sorted(kwargs.items())),
+                threading.BoundedSemaphore(
+                    app.config['EXPENSIVE_ROUTE_CONCURRENCY'],
+                ),
+            )
+        if not slots.acquire(blocking=False):
+            logging.warning(f'Too many requests for {request.endpoint}')
+            raise ServiceUnavailable(
+                'The server is busy, please try again later.',
+                retry_after=RETRY_AFTER,
+            )
+        try:
+            response = view(**kwargs)
+        except BaseException:
+            slots.release()
+            raise
+        if isinstance(response, Response) and response.is_streamed:
+            # The queries run while the response is streamed
+            response.call_on_close(slots.release)
+        else:
+            slots.release()
+        return response
+
+    return limited_view
+
+
+@app.errorhandler(QueryTimeout)
+def query_timed_out(error):
+    """A page whose queries took too long and have no earlier results."""
+
+    logging.warning(f'{request.full_path}: {error}')
+    return ServiceUnavailable(
+        'The database took too long to answer, please try again later.',
+        retry_after=RETRY_AFTER,
+    ).get_response()
+
+
+@app.before_request
+def answer_conditional_request():
+    """Answer a request for a page that did not change with a 304."""
+
+    if (
+        request.method not in ('GET', 'HEAD')
+        or request.endpoint is None
+        or request.endpoint in UNVALIDATED_ENDPOINTS
+    ):
+        return None
+
+    version = data_version.current()
+    if version is None:
+        return None
+    g.etag, g.last_modified = validators(app_code_version, version)
+
+    if request.if_none_match:
+        # The ETags of compressed responses are weak
+        not_modified = request.if_none_match.contains_weak(g.etag)
+    else:
+        not_modified = (
+            g.last_modified is not None
+            and request.if_modified_since is not None
+            and request.if_modified_since >= g.last_modified.replace(
+                microsecond=0,
+            )
+        )
+    if not_modified:
+        # The validators are added by `add_validators`
+        return Response(status=304)
+    return None
+
+
+@app.after_request
+def add_validators(response):
+    """Add the validators and the Cache-Control of the page."""
+
+    if response.status_code not in (200, 304):
+        return response
+    if g.get('from_last_results'):
+        # Outdated results, see `run_query`
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    if 'etag' not in g:
+        if 'cache_control' in g:
+            response.headers['Cache-Control'] = g.cache_control
+        return response
+
+    # A compressed response has other bytes than the uncompressed one
+    response.set_etag(g.etag, weak='Content-Encoding' in response.headers)
+    if g.last_modified is not None:
+        response.last_modified = g.last_modified
+    if 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = g.get(
+            'cache_control',
+            CACHE_CONTROL.get(request.endpoint, DEFAULT_CACHE_CONTROL),
+        )
+    return response
 
 
 def get_wikidata_results(query):
     """Get results from the Wikidata SPARQL endpoint."""
 
-    sparql = SPARQLWrapper('https://query.wikidata.org/sparql')
+    if not app.config['WIKIDATA_ENDPOINT']:
+        return None
+
+    sparql = SPARQLWrapper(app.config['WIKIDATA_ENDPOINT'])
 
     sparql.setQuery(query)
     sparql.setReturnFormat(JSON)
+    sparql.setTimeout(WIKIDATA_TIMEOUT)
 
-    return sparql.query().convert()
+    try:
+        return sparql.query().convert()
+    except (OSError, ValueError, SPARQLWrapperException) as e:
+        # The pages are shown without the information from Wikidata
+        logging.warning(f'Error querying Wikidata: {e}')
+        return None
 
 
-@app.route('/')
-def index():
-    """Render the index page.
+def get_index_data_from_rollups():
+    """
+    Build the data of the index page from the tk:MaandOverzicht rollups
+    the scraper keeps up to date, None if there are no rollups (yet).
+    """
 
-    Index page shows: 
-        - Number of zaken per month per zaak type
-        - Number of zaken per month per topic
-        - Stemgedrag per party (Voor/Tegen/Niet Deelgenomen)
-        - Aangenomen vs Verworpen per topic
+    rollups_query = """
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+
+    SELECT ?jaar ?maand ?overzicht
+    WHERE {
+        ?rollup a tk:MaandOverzicht ;
+                tk:jaar ?jaar ;
+                tk:maand ?maand ;
+                tk:overzicht ?overzicht .
+    }
+    ORDER BY ?jaar ?maand
     """
 
+    rollups = get_db_columns(rollups_query, {
+        'jaar': Column(int),
+        'maand': Column(int),
+        'overzicht': Column(str),
+    })
+    if not len(rollups):
+        return None
+
+    zaken_per_type_per_month = []
+    topics_per_month = []
+    partijen_votes = {}
+    acceptance_by_topic = {}
+
+    for jaar, maand, overzicht in rollups:
+        overzicht = json.loads(overzicht)
+
+        for soort, aantal in sorted(overzicht['zaken_per_soort'].items()):
+            zaken_per_type_per_month.append({
+                'jaar': jaar, 'maand': maand, 'type': soort, 'aantal': aantal,
+            })
+
+        for topic, aantal in sorted(overzicht['zaken_per_onderwerp'].items()):
+            topics_per_month.append({
+                'jaar': jaar, 'maand': maand, 'topic': topic, 'aantal': aantal,
+            })
+
+        # The other charts are over all months, so sum those counts
+        for partij, stemmen in overzicht['stemmen_per_fractie'].items():
+            votes = partijen_votes.setdefault(partij, {
+                'partij': partij, 'Voor': 0, 'Tegen': 0, 'Niet Deelgenomen': 0,
+            })
+            for stem_soort, aantal in stemmen.items():
+                votes[stem_soort] += aantal
+
+        for topic, resultaten in overzicht['resultaat_per_onderwerp'].items():
+            for raw_result, aantal in resultaten.items():
+                if raw_result == 'Stemmen - aangenomen':
+                    norm_label = 'Aangenomen'
+                elif raw_result == 'Stemmen - verworpen':
+                    norm_label = 'Verworpen'
+                else:
+                    continue
+                acceptance = acceptance_by_topic.setdefault(topic, {
+                    'topic': topic, 'Aangenomen': 0, 'Verworpen': 0,
+                })
+                acceptance[norm_label] += aantal
+
+    return {
+        'topics_per_month': topics_per_month,
+        'zaken_per_type_per_month': zaken_per_type_per_month,
+        'partij_vote_behaviour': [
+            partijen_votes[partij] for partij in sorted(partijen_votes)
+        ],
+        'zaak_topic_acceptance': [
+            acceptance_by_topic[topic] for topic in sorted(acceptance_by_topic)
+        ],
+    }
+
+
+def query_zaken_per_type_per_month():
+    """The number of zaken per month per zaak type, over the whole graph."""
+
     # Query to get number of zaken per month per zaak type
     zaken_per_type_query = """
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
@@ -70,16 +506,17 @@ def index():
     ORDER BY ?jaar ?maand ?zaakSoort
     """
 
-    zaken_per_type_results = get_db_results(zaken_per_type_query)
+    zaken_per_type_results = get_db_columns(zaken_per_type_query, {
+        'jaar': Column(int),
+        'maand': Column(int),
+        'zaakSoort': Column(str),
+        'aantal': Column(int, 0),
+    })
     # We transform the results from the queries to a better format for the frontend
     zaken_per_type_per_month = []
     # For each result, add a new entry to the zaken_per_type_per_month list
 
-    for result in zaken_per_type_results['results']['bindings']:
-        jaar = int(result['jaar']['value'])
-        maand = int(result['maand']['value'])
-        soort = result['zaakSoort']['value']
-        aantal = int(result['aantal']['value'])
+    for jaar, maand, soort, aantal in zaken_per_type_results:
         zaken_per_type_per_month.append({
             'jaar': jaar,
             'maand': maand,
@@ -87,6 +524,12 @@ def index():
             'aantal': aantal,
         })
 
+    return zaken_per_type_per_month
+
+
+def query_topics_per_month():
+    """The number of zaken per month per topic, over the whole graph."""
+
     # Query to get number of zaken per month per topic
     topics_over_time_query = """
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
@@ -108,14 +551,15 @@ def index():
     """
 
     # Execute the SPARQL query to get topics over time
-    topics_results = get_db_results(topics_over_time_query)
+    topics_results = get_db_columns(topics_over_time_query, {
+        'jaar': Column(int),
+        'maand': Column(int),
+        'topicName': Column(str),
+        'aantalZaken': Column(int, 0),
+    })
 
     topics_per_month = []
-    for result in topics_results['results']['bindings']:
-        jaar = int(result['jaar']['value'])
-        maand = int(result['maand']['value'])
-        topic = result['topicName']['value']
-        aantal = int(result['aantalZaken']['value'])
+    for jaar, maand, topic, aantal in topics_results:
         topics_per_month.append({
             'jaar': jaar,
             'maand': maand,
@@ -123,6 +567,12 @@ def index():
             'aantal': aantal,
         })
 
+    return topics_per_month
+
+
+def query_partij_vote_behaviour():
+    """The Voor/Tegen/Niet Deelgenomen votes per party."""
+
     # Stemgedrag partijen voor/tegen/onthouden
     vote_behaviour_parties_qeury = """
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
@@ -154,15 +604,16 @@ def index():
     GROUP BY ?partijNaam ?stemSoort
     ORDER BY ?partijNaam ?stemSoort
     """
-    vote_behaviour_parties_results = get_db_results(
-        vote_behaviour_parties_qeury,
+    vote_behaviour_parties_results = get_db_columns(
+        vote_behaviour_parties_qeury, {
+            'partijNaam': Column(str),
+            'stemSoort': Column(str),
+            'aantalStemmen': Column(int, 0),
+        },
     )
 
     partijen_votes = {}
-    for result in vote_behaviour_parties_results['results']['bindings']:
-        partij = result['partijNaam']['value']
-        stem_soort = result['stemSoort']['value']
-        aantal = int(result['aantalStemmen']['value'])
+    for partij, stem_soort, aantal in vote_behaviour_parties_results:
         if partij not in partijen_votes:
             partijen_votes[partij] = {
                 'Voor': 0,
@@ -182,6 +633,12 @@ def index():
         }
         partij_vote_behaviour.append(entry)
 
+    return partij_vote_behaviour
+
+
+def query_zaak_topic_acceptance():
+    """The number of aangenomen and verworpen zaken per topic."""
+
     zaak_acceptance_per_topic_query = """
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
     PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
@@ -198,17 +655,17 @@ def index():
     ORDER BY ?topicName ?resultaat
     """
 
-    zaak_acceptance_per_topic_results = get_db_results(
-        zaak_acceptance_per_topic_query,
+    zaak_acceptance_per_topic_results = get_db_columns(
+        zaak_acceptance_per_topic_query, {
+            'topicName': Column(str),
+            'resultaat': Column(str),
+            'aantalZaken': Column(int, 0),
+        },
     )
 
     # Transform results for frontend: normalize raw labels and aggregate per topic
     acceptance_by_topic = {}
-    for result in zaak_acceptance_per_topic_results['results']['bindings']:
-        topic = result['topicName']['value']
-        raw_result = result['resultaat']['value']
-        aantal = int(result['aantalZaken']['value'])
-
+    for topic, raw_result, aantal in zaak_acceptance_per_topic_results:
         if raw_result == 'Stemmen - aangenomen':
             norm_label = 'Aangenomen'
         elif raw_result == 'Stemmen - verworpen':
@@ -223,76 +680,87 @@ def index():
             }
         acceptance_by_topic[topic][norm_label] += aantal
 
-    zaak_acceptance = list(acceptance_by_topic.values())
+    return list(acceptance_by_topic.values())
 
-    return render_template(
-        'index.html',
-        topics_per_month=topics_per_month,
-        zaken_per_type_per_month=zaken_per_type_per_month,
-        partij_vote_behaviour=partij_vote_behaviour,
-        zaak_topic_acceptance=zaak_acceptance,
-    )
 
+# The charts of the index page by the name of their data endpoint: their
+# key in the data of the rollups and the function that counts over the
+# whole graph instead
+INDEX_CHARTS = {
+    'zaken-per-type': (
+        'zaken_per_type_per_month', query_zaken_per_type_per_month,
+    ),
+    'topics-per-month': ('topics_per_month', query_topics_per_month),
+    'vote-behaviour': ('partij_vote_behaviour', query_partij_vote_behaviour),
+    'acceptance': ('zaak_topic_acceptance', query_zaak_topic_acceptance),
+}
 
-@app.route('/agreement')
-def agreement():
-    """This page will show all the agreements between the parties in a cross table, and adds crosstables per topic."""
 
-    # Get global cross-table for all zaken
-    query = """
-    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+def get_index_chart(name):
+    """The data of a chart of the index page."""
 
-    SELECT
-        ?partyA_ab
-        ?partyB_ab
-        (COUNT(?zaak) AS ?commonVotes)
-        (SUM(IF(?voteA = ?voteB, 1, 0)) AS ?agreements)
-        (((SUM(IF(?voteA = ?voteB, 1, 0))) * 100.0 / COUNT(?zaak)) AS ?agreementPercentage)
-    WHERE {
-        ?zaak a tk:Zaak .
+    key, query = INDEX_CHARTS[name]
 
-        { ?partyA tk:heeftVoorGestemd ?zaak . BIND("voor" AS ?voteA) }
-        UNION
-        { ?partyA tk:heeftTegenGestemd ?zaak . BIND("tegen" AS ?voteA) }
-        ?partyA a tk:Fractie ;
-                tk:afkorting ?partyA_ab .
+    # Use the monthly rollups if the scraper made them, otherwise count
+    # over the whole graph
+    index_data = get_index_data_from_rollups()
+    if index_data is not None:
+        return index_data[key]
+    return query()
 
-        { ?partyB tk:heeftVoorGestemd ?zaak . BIND("voor" AS ?voteB) }
-        UNION
-        { ?partyB tk:heeftTegenGestemd ?zaak . BIND("tegen" AS ?voteB) }
-        ?partyB a tk:Fractie ;
-                tk:afkorting ?partyB_ab .
 
-        FILTER(?partyA_ab < ?partyB_ab)
-    }
-    GROUP BY ?partyA_ab ?partyB_ab
-    ORDER BY ?partyA_ab ?partyB_ab
-    """
-
-    results = get_db_results(query)
-    agreements = []
-    for result in results['results']['bindings']:
-        agreements.append({
-            'partyA_ab': result['partyA_ab']['value'],
-            'partyB_ab': result['partyB_ab']['value'],
-            'commonVotes': result['commonVotes']['value'],
-            'agreements': result['agreements']['value'],
-            'agreementPercentage': result['agreementPercentage']['value'],
-        })
+@app.route('/')
+def index():
+    """Render the index page.
+
+    Index page shows: 
+        - Number of zaken per month per zaak type
+        - Number of zaken per month per topic
+        - Stemgedrag per party (Voor/Tegen/Niet Deelgenomen)
+        - Aangenomen vs Verworpen per topic
+
+    The page loads the data of the charts itself, see `chart_data`.
+    """
+
+    return render_template('index.html')
+
+
+def get_agreement_dates():
+    """
+    The start_date and end_date of the request, to only count the zaken
+    from start_date up to and including end_date (None if not given).
+    """
 
+    try:
+        start_date = request.args.get('start_date', '')
+        start_date = (
+            datetime.date.fromisoformat(start_date) if start_date else None
+        )
+        end_date = request.args.get('end_date', '')
+        end_date = datetime.date.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        abort(400)
+    return start_date, end_date
+
+
+@app.route('/agreement')
+@cached_page
+@limit_concurrency
+def agreement():
+    """This page will show all the agreements between the parties in a cross table, and adds crosstables per topic."""
+
+    start_date, end_date = get_agreement_dates()
+
+    # The agreements come from the agreement index instead of a self-join
+    # of all votes per request
     agreement_dict = {}
-    for agreement in agreements:
-        key1 = (agreement['partyA_ab'], agreement['partyB_ab'])
-        key2 = (agreement['partyB_ab'], agreement['partyA_ab'])
-        pct = float(agreement['agreementPercentage'])
-        agreement_dict[key1] = pct
-        agreement_dict[key2] = pct
-
-    parties = set()
-    for agreement in agreements:
-        parties.add(agreement['partyA_ab'])
-        parties.add(agreement['partyB_ab'])
-    parties = sorted(list(parties))
+    for (party_a, party_b), pct in agreement_index.agreement(
+        start_date, end_date,
+    ).items():
+        agreement_dict[(party_a, party_b)] = pct
+        agreement_dict[(party_b, party_a)] = pct
+
+    parties = sorted({party for party, _ in agreement_dict})
 
     agreement_matrix = {}
     for row_party in parties:
@@ -306,69 +774,96 @@ def agreement():
                     key, None,
                 )
 
-    # Get cross-table for each topic
-    topic_query = """
-    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
-    SELECT ?topic ?partyA_ab ?partyB_ab (COUNT(?zaak) AS ?commonVotes) (SUM(IF(?voteA = ?voteB, 1, 0)) AS ?agreements)
-           (((SUM(IF(?voteA = ?voteB, 1, 0))) * 100.0 / COUNT(?zaak)) AS ?agreementPercentage)
-    WHERE {
-      ?zaak a tk:Zaak ;
-            tk:heeftOnderwerp ?onderwerp .
-      ?onderwerp tk:onderwerpType ?topic .
-      { ?partyA tk:heeftVoorGestemd ?zaak . BIND("voor" AS ?voteA) }
-      UNION
-      { ?partyA tk:heeftTegenGestemd ?zaak . BIND("tegen" AS ?voteA) }
-      ?partyA a tk:Fractie ; tk:afkorting ?partyA_ab .
-      { ?partyB tk:heeftVoorGestemd ?zaak . BIND("voor" AS ?voteB) }
-      UNION
-      { ?partyB tk:heeftTegenGestemd ?zaak . BIND("tegen" AS ?voteB) }
-      ?partyB a tk:Fractie ; tk:afkorting ?partyB_ab .
-      FILTER(?partyA_ab < ?partyB_ab)
-    }
-    GROUP BY ?topic ?partyA_ab ?partyB_ab
-    ORDER BY ?topic ?partyA_ab ?partyB_ab
-    """
-    topic_results = get_db_results(topic_query)
-
-    # We transform the results from the queries to a better format for the frontend
-    topic_agreement = {}
-    all_topics = set()
-    for res in topic_results['results']['bindings']:
-        topic = res['topic']['value']
-        partyA = res['partyA_ab']['value']
-        partyB = res['partyB_ab']['value']
-        pct = float(res['agreementPercentage']['value'])
-        all_topics.add(topic)
-        if topic not in topic_agreement:
-            topic_agreement[topic] = {}
-        topic_agreement[topic][(partyA, partyB)] = pct
-        topic_agreement[topic][(partyB, partyA)] = pct
-    all_topics = sorted(list(all_topics))
-
-    topic_agreement_tables = {}
-    for topic in all_topics:
-        topic_matrix = {}
-        for row_party in parties:
-            topic_matrix[row_party] = {}
-            for col_party in parties:
-                if row_party == col_party:
-                    topic_matrix[row_party][col_party] = 100.0
-                else:
-                    pct = topic_agreement.get(topic, {}).get(
-                        (row_party, col_party), None,
-                    )
-                    topic_matrix[row_party][col_party] = pct
-        topic_agreement_tables[topic] = topic_matrix
-
+    # The cross tables per topic and the trend chart load their data
+    # themselves, see `chart_data`
     return render_template(
         'agreement.html',
         parties=parties,
         agreement_matrix=agreement_matrix,
-        topic_agreement_tables=topic_agreement_tables,
-        all_topics=all_topics,
+        start_date=start_date,
+        end_date=end_date,
     )
 
 
+def get_agreement_per_topic():
+    """
+    The agreement of every pair of parties per topic, by 'party|party'
+    with the parties in alphabetical order.
+    """
+
+    start_date, end_date = get_agreement_dates()
+    return {
+        topic: {
+            f'{party_a}|{party_b}': pct
+            for (party_a, party_b), pct in topic_pcts.items()
+        }
+        for topic, topic_pcts in sorted(
+            agreement_index.agreement_per_topic(start_date, end_date).items(),
+        )
+        if topic_pcts
+    }
+
+
+def get_agreement_trend():
+    """The agreement of every pair of parties per month."""
+
+    start_date, end_date = get_agreement_dates()
+    months, monthly = agreement_index.monthly_agreement(start_date, end_date)
+    return {
+        'months': months,
+        'series': {
+            f'{party_a}|{party_b}': series
+            for (party_a, party_b), series in monthly.items()
+            if any(pct is not None for pct in series)
+        },
+    }
+
+
+# The data of the charts by name, see `chart_data`
+CHARTS = {
+    **{
+        name: functools.partial(get_index_chart, name)
+        for name in INDEX_CHARTS
+    },
+    'agreement-per-topic': get_agreement_per_topic,
+    'agreement-trend': get_agreement_trend,
+}
+
+
+def compressed_json(view):
+    """
+    Send the JSON encoded by `compression.encode_json` that the view
+    returns in the encoding the client prefers.
+    """
+
+    @functools.wraps(view)
+    def compressed_view(**kwargs):
+        encoded = view(**kwargs)
+        encoding = best_encoding(request.accept_encodings)
+        response = Response(encoded[encoding], mimetype='application/json')
+        if encoding != 'identity':
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    return compressed_view
+
+
+@app.route('/data/<chart>')
+@compressed_json
+@cached_page
+@limit_concurrency
+def chart_data(chart):
+    """
+    The data of a chart of the index or agreement page, so the pages are
+    sent right away and load the data of their charts in parallel.
+    """
+
+    if chart not in CHARTS:
+        abort(404)
+    return encode_json(CHARTS[chart]())
+
+
 @app.route('/fracties')
 def fracties():
     # Get all parties and their number of seats
@@ -383,13 +878,17 @@ def fracties():
     }
     ORDER BY DESC(?aantalZetels)
     """
-    results = get_db_results(query)
+    results = get_db_columns(query, {
+        'fractieNaam': Column(str),
+        'aantalZetels': Column(int),
+        'fractieAfko': Column(str),
+    })
     fracties = []
-    for result in results['results']['bindings']:
+    for naam, zetels, afkorting in results:
         fracties.append({
-            'name': result['fractieNaam']['value'],
-            'seats': int(result['aantalZetels']['value']),
-            'abbreviation': result['fractieAfko']['value'],
+            'name': naam,
+            'seats': zetels,
+            'abbreviation': afkorting,
         })
     return render_template('fracties.html', fracties=fracties)
 
@@ -399,68 +898,29 @@ def fractie_detail(fractie_naam):
 
     decoded_fractie_naam = unquote(fractie_naam)
 
-    query = f"""
-    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
-
-    SELECT ?onderwerpType (COUNT(DISTINCT ?zaakVoor) AS ?stemmenVoor) (COUNT(DISTINCT ?zaakTegen) AS ?stemmenTegen) (COUNT(DISTINCT ?zaakNietDeelgenomen) AS ?stemmenNietDeelgenomen)
-    WHERE {{
-      # Find the fractie by name
-      ?fractie a tk:Fractie ;
-               tk:naam "{decoded_fractie_naam}" .
-
-      # Use a VALUES block to define the vote types we are interested in
-      VALUES ?voteProperty {{ tk:heeftVoorGestemd tk:heeftTegenGestemd tk:heeftNietDeelgenomen }}
-
-      # Find all zaken the fractie has voted on
-      ?fractie ?voteProperty ?zaak .
-
-      # Get the onderwerp for each zaak
-      ?zaak tk:heeftOnderwerp ?onderwerp .
-      ?onderwerp tk:onderwerpType ?onderwerpType .
-
-      # Use BIND to conditionally link zaken to vote types for counting.
-      BIND(IF(?voteProperty = tk:heeftVoorGestemd, ?zaak, 1/0) AS ?zaakVoor)
-      BIND(IF(?voteProperty = tk:heeftTegenGestemd, ?zaak, 1/0) AS ?zaakTegen)
-      BIND(IF(?voteProperty = tk:heeftNietDeelgenomen, ?zaak, 1/0) AS ?zaakNietDeelgenomen)
-    }}
-    GROUP BY ?onderwerpType
-    ORDER BY ?onderwerpType
-    """
-
-    results = get_db_results(query)
-
-    onderwerp_votes = {}
-    total_votes = {'voor': 0, 'tegen': 0, 'niet_deelgenomen': 0}
-
-    for result in results['results']['bindings']:
-        onderwerp = result['onderwerpType']['value']
-        voor = int(result['stemmenVoor']['value'])
-        tegen = int(result['stemmenTegen']['value'])
-        niet_deelgenomen = int(result['stemmenNietDeelgenomen']['value'])
+    fractie_uris = entity_index.resolve('fractie', decoded_fractie_naam)
+    if not fractie_uris:
+        abort(404)
+    fractie_values = values_clause('fractie', fractie_uris)
 
-        onderwerp_votes[onderwerp] = {
-            'voor': voor,
-            'tegen': tegen,
-            'niet_deelgenomen': niet_deelgenomen,
-        }
-
-        total_votes['voor'] += voor
-        total_votes['tegen'] += tegen
-        total_votes['niet_deelgenomen'] += niet_deelgenomen
+    profiel = get_actor_profiel(fractie_uris)
+    onderwerp_votes = profiel['onderwerp_votes']
+    total_votes = {
+        keuze: sum(votes[keuze] for votes in onderwerp_votes.values())
+        for keuze in ('voor', 'tegen', 'niet_deelgenomen')
+    }
 
     leden_query = f"""
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
     SELECT ?persoonNaam WHERE {{
-      ?fractie tk:naam "{decoded_fractie_naam}" ;
-               tk:heeftLid ?persoon .
+      {fractie_values}
+      ?fractie tk:heeftLid ?persoon .
       ?persoon tk:naam ?persoonNaam .
     }} ORDER BY ?persoonNaam
     """
-    leden_results = get_db_results(leden_query)
-    leden = [
-        res['persoonNaam']['value']
-        for res in leden_results['results']['bindings']
-    ]
+    leden = get_db_columns(leden_query, {
+        'persoonNaam': Column(str),
+    })['persoonNaam']
 
     # Fetch Wikidata info for this fractie by Dutch label
     wikidata_query = f"""
@@ -472,7 +932,7 @@ def fractie_detail(fractie_naam):
 
     SELECT ?item ?itemLabel ?shortName ?website ?inception ?memberCount ?ideology ?ideologyLabel WHERE {{
       ?item wdt:P31 wd:Q7278 ;  # instance of political party
-            rdfs:label "{decoded_fractie_naam}"@nl .
+            rdfs:label {sparql_literal(decoded_fractie_naam)}@nl .
       OPTIONAL {{ ?item wdt:P1813 ?shortName . }}
       OPTIONAL {{ ?item wdt:P856 ?website . }}
       OPTIONAL {{ ?item wdt:P571 ?inception . }}
@@ -514,120 +974,44 @@ def fractie_detail(fractie_naam):
             'ideology': ideology_label,
         }
 
-    # Recent zaken the fractie voted on (with their vote)
-    recent_zaken_query = f"""
-    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
-    SELECT ?zaakNummer ?beschrijving ?datum (SUM(?voor) AS ?stemmenVoor) (SUM(?tegen) AS ?stemmenTegen) (SUM(?nietDeelgenomen) AS ?stemmenNietDeelgenomen)
-    WHERE {{
-      ?fractie a tk:Fractie ;
-               tk:naam "{decoded_fractie_naam}" .
-
-      ?zaak a tk:Zaak ;
-            tk:nummer ?zaakNummer ;
-            tk:beschrijving ?beschrijving .
-      OPTIONAL {{ ?zaak tk:indieningsDatum ?datum . }}
-
-      BIND(IF(EXISTS {{ ?fractie tk:heeftVoorGestemd ?zaak }}, 1, 0) AS ?voor)
-      BIND(IF(EXISTS {{ ?fractie tk:heeftTegenGestemd ?zaak }}, 1, 0) AS ?tegen)
-      BIND(IF(EXISTS {{ ?fractie tk:heeftNietDeelgenomen ?zaak }}, 1, 0) AS ?nietDeelgenomen)
-    }}
-    GROUP BY ?zaakNummer ?beschrijving ?datum
-    ORDER BY DESC(?datum) ?zaakNummer
-    LIMIT 10
-    """
-
-    recent_results = get_db_results(recent_zaken_query)
-
-    recent_zaken = []
-    for res in recent_results['results']['bindings']:
-        vote_label = 'Onbekend'
-        stemmen_voor = int(res.get('stemmenVoor', {}).get('value', '0'))
-        stemmen_tegen = int(res.get('stemmenTegen', {}).get('value', '0'))
-        stemmen_niet = int(
-            res.get('stemmenNietDeelgenomen', {}).get('value', '0'),
-        )
-        if stemmen_voor == 1:
-            vote_label = 'Voor'
-        elif stemmen_tegen == 1:
-            vote_label = 'Tegen'
-        elif stemmen_niet == 1:
-            vote_label = 'Niet Deelgenomen'
-
-        recent_zaken.append({
-            'nummer': res['zaakNummer']['value'],
-            'beschrijving': res['beschrijving']['value'],
-            'datum': res.get('datum', {}).get('value'),
-            'vote': vote_label,
-        })
-
     return render_template(
         'fractie.html',
         fractie_naam=decoded_fractie_naam,
         leden=leden,
         total_votes=total_votes,
         onderwerp_votes=onderwerp_votes,
-        recent_zaken=recent_zaken,
+        recent_zaken=profiel['recent_zaken'],
+        cohesie=profiel.get('cohesie'),
         wikidata=wikidata_info,
         member_count=len(leden),
     )
 
 
-@app.route('/zaken')
-def zaken_lijst():
-    start_date = request.args.get('start_date', '')
-    end_date = request.args.get('end_date', '')
-    onderwerp_filter = request.args.get('onderwerp_type', '')
-    resultaat_filter = request.args.get('resultaat', '')
-    zaak_type_filter = request.args.get('zaak_type', '')
-
-    # Pagination parameters
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
-    offset = (page - 1) * per_page
-
-    besluit_query = """
-    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
-    SELECT DISTINCT ?besluitResultaat WHERE {
-        ?zaak a tk:Zaak ;
-              tk:besluitResultaat ?besluitResultaat .
-    }
-    ORDER BY ?besluitResultaat
-    """
+def get_zaken_filters():
+    """The filters of the zaken list and exports from the request."""
 
-    zaak_soort_query = """
-    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
-    SELECT DISTINCT ?zaakSoort WHERE {
-        ?zaak a tk:Zaak ;
-              tk:zaakSoort ?zaakSoort .
+    filters = {
+        'start_date': request.args.get('start_date', ''),
+        'end_date': request.args.get('end_date', ''),
+        'onderwerp_type': request.args.get('onderwerp_type', ''),
+        'resultaat': request.args.get('resultaat', ''),
+        'zaak_type': request.args.get('zaak_type', ''),
+        'q': request.args.get('q', '').strip(),
     }
-    ORDER BY ?zaakSoort
-    """
-
-    besluit_results = get_db_results(besluit_query)
-    zaak_soort_results = get_db_results(zaak_soort_query)
+    for date_filter in ('start_date', 'end_date'):
+        if filters[date_filter]:
+            try:
+                datetime.date.fromisoformat(filters[date_filter])
+            except ValueError:
+                abort(400)
+    return filters
 
-    besluit_opties = [
-        res['besluitResultaat']['value']
-        for res in besluit_results['results']['bindings']
-    ]
-    zaak_type_opties = [
-        res['zaakSoort']['value']
-        for res in zaak_soort_results['results']['bindings']
-    ]
 
-    onderwerp_opties = [
-        'Binnenlandse Zaken en Koninkrijksrelaties',
-        'Buitenlandse Zaken en Defensie',
-        'Economie en Financien',
-        'Infrastructuur en Waterstaat',
-        'Justitie en Veiligheid',
-        'Klimaat en Energie',
-        'Landbouw en Natuur',
-        'Onderwijs Cultuur en Wetenschap',
-        'Sociale Zaken en Werkgelegenheid',
-        'Volksgezondheid en Zorg',
-        'Other',
-    ]
+def build_zaken_where(filters, gevonden_zaken=None):
+    """
+    The WHERE clause of the zaken that match `filters`, limited to the
+    URIs in `gevonden_zaken` if given (the matches of a search).
+    """
 
     # Note: We build the query step by step, because this way we can optimize the
     # query a bit more. In early testing this page took over 10seconds to load because 
@@ -642,37 +1026,45 @@ def zaken_lijst():
 
     # Apply date filters early (before optional clauses)
     early_filters = []
-    if start_date:
+    if filters['start_date']:
         early_filters.append(
-            f'FILTER (?indieningsDatum >= "{start_date}"^^xsd:date)',
+            'FILTER (?indieningsDatum >= '
+            f'{sparql_literal(filters["start_date"])}^^xsd:date)',
         )
-    if end_date:
+    if filters['end_date']:
         early_filters.append(
-            f'FILTER (?indieningsDatum <= "{end_date}"^^xsd:date)',
+            'FILTER (?indieningsDatum <= '
+            f'{sparql_literal(filters["end_date"])}^^xsd:date)',
         )
 
     onderwerp_pattern = ''
-    if onderwerp_filter:
+    if filters['onderwerp_type']:
         base_patterns.append('?zaak tk:heeftOnderwerp ?onderwerp')
         base_patterns.append('?onderwerp tk:onderwerpType ?onderwerpType')
-        early_filters.append(f'FILTER (?onderwerpType = "{onderwerp_filter}")')
+        early_filters.append(
+            'FILTER (?onderwerpType = '
+            f'{sparql_literal(filters["onderwerp_type"])})',
+        )
     else:
         onderwerp_pattern = 'OPTIONAL { ?zaak tk:heeftOnderwerp ?onderwerp . ?onderwerp tk:onderwerpType ?onderwerpType . }'
 
     optional_patterns = []
-    if not resultaat_filter:
+    if not filters['resultaat']:
         optional_patterns.append('?zaak tk:besluitResultaat ?besluitResultaat')
     else:
         base_patterns.append('?zaak tk:besluitResultaat ?besluitResultaat')
         early_filters.append(
-            f'FILTER (?besluitResultaat = "{resultaat_filter}")',
+            'FILTER (?besluitResultaat = '
+            f'{sparql_literal(filters["resultaat"])})',
         )
 
-    if not zaak_type_filter:
+    if not filters['zaak_type']:
         optional_patterns.append('?zaak tk:zaakSoort ?zaakSoort')
     else:
         base_patterns.append('?zaak tk:zaakSoort ?zaakSoort')
-        early_filters.append(f'FILTER (?zaakSoort = "{zaak_type_filter}")')
+        early_filters.append(
+            f'FILTER (?zaakSoort = {sparql_literal(filters["zaak_type"])})',
+        )
 
     # We join the base patterns, early filters and optional patterns 
     where_clause = ' .\n        '.join(base_patterns) + ' .'
@@ -681,26 +1073,112 @@ def zaken_lijst():
     if optional_patterns:
         where_clause += '\n        OPTIONAL { ' + \
             ' . '.join(optional_patterns) + ' . }'
-    if onderwerp_pattern and not onderwerp_filter:
+    if onderwerp_pattern:
         where_clause += '\n        ' + onderwerp_pattern
 
+    if gevonden_zaken is not None:
+        where_clause = (
+            values_clause('zaak', gevonden_zaken) + '\n        ' + where_clause
+        )
+    return where_clause
+
+
+@app.route('/zaken')
+@limit_concurrency
+def zaken_lijst():
+    filters = get_zaken_filters()
+
+    # Pagination parameters
+    page = request.args.get('page', 1, type=int)
+    per_page = 20
+    offset = (page - 1) * per_page
+
+    besluit_query = """
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    SELECT DISTINCT ?besluitResultaat WHERE {
+        ?zaak a tk:Zaak ;
+              tk:besluitResultaat ?besluitResultaat .
+    }
+    ORDER BY ?besluitResultaat
+    """
+
+    zaak_soort_query = """
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    SELECT DISTINCT ?zaakSoort WHERE {
+        ?zaak a tk:Zaak ;
+              tk:zaakSoort ?zaakSoort .
+    }
+    ORDER BY ?zaakSoort
+    """
+
+    besluit_opties = get_db_columns(besluit_query, {
+        'besluitResultaat': Column(str),
+    })['besluitResultaat']
+    zaak_type_opties = get_db_columns(zaak_soort_query, {
+        'zaakSoort': Column(str),
+    })['zaakSoort']
+
+    onderwerp_opties = [
+        'Binnenlandse Zaken en Koninkrijksrelaties',
+        'Buitenlandse Zaken en Defensie',
+        'Economie en Financien',
+        'Infrastructuur en Waterstaat',
+        'Justitie en Veiligheid',
+        'Klimaat en Energie',
+        'Landbouw en Natuur',
+        'Onderwijs Cultuur en Wetenschap',
+        'Sociale Zaken en Werkgelegenheid',
+        'Volksgezondheid en Zorg',
+        'Other',
+    ]
+
+    # Searching limits the zaken to the best matches of the search index,
+    # which are then ranked instead of sorted by date
+    gevonden_zaken = (
+        search_index.search(filters['q']) if filters['q'] else None
+    )
+    where_clause = build_zaken_where(filters, gevonden_zaken)
+
     limit = per_page + 1
-    if not onderwerp_filter:
+    if not filters['onderwerp_type']:
         limit = per_page + 5
 
+    if gevonden_zaken is not None:
+        order_clause = ''
+    else:
+        order_clause = f"""ORDER BY DESC(?indieningsDatum)
+    LIMIT {limit} OFFSET {offset}"""
+
     # We build the final query
     query = f"""
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
     PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-    SELECT DISTINCT ?zaakNummer ?beschrijving ?besluitResultaat ?indieningsDatum ?zaakSoort ?onderwerpType
+    SELECT DISTINCT ?zaak ?zaakNummer ?beschrijving ?besluitResultaat
+                    ?indieningsDatum ?zaakSoort ?onderwerpType
     WHERE {{
         {where_clause}
-    }} ORDER BY DESC(?indieningsDatum)
-    LIMIT {limit} OFFSET {offset}
+    }} {order_clause}
     """
 
-    results = get_db_results(query)
-    bindings = results['results']['bindings']
+    if gevonden_zaken == []:
+        bindings = []
+    else:
+        results = get_db_results(query)
+        bindings = results['results']['bindings']
+
+    if gevonden_zaken:
+        # All matches are fetched, so rank and page them here
+        rank = {zaak: i for i, zaak in enumerate(gevonden_zaken)}
+        bindings = sorted(
+            bindings, key=lambda result: rank[result['zaak']['value']],
+        )
+        seen_zaken = set()
+        bindings = [
+            result for result in bindings
+            if result['zaak']['value'] not in seen_zaken
+            and not seen_zaken.add(result['zaak']['value'])
+        ]
+        bindings = bindings[offset:offset + per_page + 1]
 
     seen_zaken = set()
     unique_bindings = []
@@ -744,105 +1222,368 @@ def zaken_lijst():
         total_pages=total_pages,
         has_prev=has_prev,
         has_next=has_next,
-        filters={
-            'start_date': start_date,
-            'end_date': end_date,
-            'onderwerp_type': onderwerp_filter,
-            'resultaat': resultaat_filter,
-            'zaak_type': zaak_type_filter,
-        },
+        filters=filters,
         onderwerp_opties=onderwerp_opties,
         besluit_opties=besluit_opties,
         zaak_type_opties=zaak_type_opties,
     )
 
 
+@app.route('/autocomplete')
+def autocomplete():
+    """Fracties, personen and zaken that match what is typed so far."""
+
+    # The detail route and its argument for every kind of match
+    routes = {
+        'fractie': ('fractie_detail', 'fractie_naam'),
+        'persoon': ('persoon_detail', 'persoon_naam'),
+        'zaak': ('zaak_detail', 'zaak_nummer'),
+    }
+
+    suggestions = []
+    for kind, key in entity_index.complete(request.args.get('q', '')):
+        endpoint, argument = routes[kind]
+        suggestions.append({
+            'type': kind,
+            'label': key,
+            'url': url_for(endpoint, **{argument: key}),
+        })
+    return jsonify(suggestions)
+
+
+# The columns of the exports and the query variables they come from
+ZAKEN_EXPORT_COLUMNS = {
+    'nummer': 'zaakNummer',
+    'beschrijving': 'beschrijving',
+    'datum': 'indieningsDatum',
+    'type': 'zaakSoort',
+    'onderwerp': 'onderwerpType',
+    'resultaat': 'besluitResultaat',
+}
+VOTES_EXPORT_COLUMNS = {
+    'zaak': 'zaakNummer',
+    'datum': 'indieningsDatum',
+    'actor_type': 'actorType',
+    'actor': 'actorNaam',
+    'fractie': 'afkorting',
+    'keuze': 'keuze',
+}
+
+
+def export_rows(columns, query):
+    """The rows of `query` as tuples of `columns`, as they are read."""
+
+    return get_db_rows(query, list(columns.values()))
+
+
+def zaken_export_query(where_clause):
+    variables = ' '.join(f'?{v}' for v in ZAKEN_EXPORT_COLUMNS.values())
+    return f"""
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+    SELECT DISTINCT {variables}
+    WHERE {{
+        {where_clause}
+    }} ORDER BY ?indieningsDatum ?zaakNummer
+    """
+
+
+def votes_export_query(where_clause):
+    variables = ' '.join(f'?{v}' for v in VOTES_EXPORT_COLUMNS.values())
+    return f"""
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+    SELECT DISTINCT {variables}
+    WHERE {{
+        {where_clause}
+        VALUES (?voteProperty ?keuze) {{
+            (tk:heeftVoorGestemd "Voor")
+            (tk:heeftTegenGestemd "Tegen")
+            (tk:heeftNietDeelgenomen "Niet Deelgenomen")
+        }}
+        ?actor ?voteProperty ?zaak ;
+               tk:naam ?actorNaam .
+        {{
+            ?actor a tk:Fractie .
+            OPTIONAL {{ ?actor tk:afkorting ?afkorting . }}
+            BIND ("fractie" AS ?actorType)
+        }}
+        UNION
+        {{
+            ?actor a tk:Persoon .
+            OPTIONAL {{ ?actor tk:isLidVan/tk:afkorting ?afkorting . }}
+            BIND ("persoon" AS ?actorType)
+        }}
+    }} ORDER BY ?indieningsDatum ?zaakNummer ?actorType ?actorNaam
+    """
+
+
+@app.route('/export/<any(zaken, votes):export>')
+@limit_concurrency
+def export(export):
+    """
+    All zaken or votes on the zaken that match the filters of the zaken
+    list, as CSV (the default) or NDJSON (format=ndjson). The rows are
+    streamed as they are read from the store.
+    """
+
+    format = request.args.get('format', 'csv')
+    if format not in FORMATS:
+        abort(400)
+
+    filters = get_zaken_filters()
+    gevonden_zaken = (
+        search_index.search(filters['q']) if filters['q'] else None
+    )
+    where_clause = build_zaken_where(filters, gevonden_zaken)
+
+    if export == 'zaken':
+        columns = ZAKEN_EXPORT_COLUMNS
+        query = zaken_export_query(where_clause)
+    else:
+        columns = VOTES_EXPORT_COLUMNS
+        query = votes_export_query(where_clause)
+
+    return Response(
+        export_lines(format, list(columns), export_rows(columns, query)),
+        mimetype=FORMATS[format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename={export}.{format}'
+            ),
+        },
+    )
+
+
+@app.route('/export/snapshots/<path:filename>')
+def export_snapshot(filename):
+    """A compressed export made by `flask export-snapshots`."""
+
+    return send_from_directory(app.config['EXPORT_DIR'], filename)
+
+
+@app.cli.command('export-snapshots')
+@click.option('--output-dir', default=None, help='Defaults to EXPORT_DIR.')
+def export_snapshots(output_dir):
+    """Write all zaken and votes as gzipped CSV and NDJSON files."""
+
+    output_dir = output_dir or app.config['EXPORT_DIR']
+    os.makedirs(output_dir, exist_ok=True)
+
+    where_clause = build_zaken_where({
+        'start_date': '', 'end_date': '', 'onderwerp_type': '',
+        'resultaat': '', 'zaak_type': '',
+    })
+    exports = {
+        'zaken': (ZAKEN_EXPORT_COLUMNS, zaken_export_query(where_clause)),
+        'votes': (VOTES_EXPORT_COLUMNS, votes_export_query(where_clause)),
+    }
+    for name, (columns, query) in exports.items():
+        for format in FORMATS:
+            path = os.path.join(output_dir, f'{name}.{format}.gz')
+            lines = export_lines(
+                format, list(columns), export_rows(columns, query),
+            )
+            n_lines = write_snapshot(path, lines)
+            click.echo(f'Wrote {n_lines} lines to {path}')
+
+
 @app.route('/zaak/<path:zaak_nummer>')
 def zaak_detail(zaak_nummer):
 
     decoded_zaak_nummer = unquote(zaak_nummer)
 
+    zaak_uris = entity_index.resolve('zaak', decoded_zaak_nummer)
+    if not zaak_uris:
+        return render_template('zaak_detail.html', zaak_info={}, stemmingen=[])
+
+    # The votes of the fracties are stored with the zaak by the scraper
+    # (tk:stemmingsOverzicht), so a single lookup of the zaak is enough
     query = f"""
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
-    SELECT ?fractieNaam
-           (SUM(?voor) AS ?stemmenVoor)
-           (SUM(?tegen) AS ?stemmenTegen)
-           (SUM(?nietDeelgenomen) AS ?stemmenNietDeelgenomen)
-           ?beschrijving ?onderwerp ?besluitResultaat
+    SELECT ?beschrijving ?onderwerp ?besluitResultaat
            ?volgnummer ?indieningsDatum ?besluitStemmingsoort ?dossierNummer
+           ?stemmingsOverzicht
     WHERE {{
-      ?zaak tk:nummer "{decoded_zaak_nummer}" ;
-            tk:beschrijving ?beschrijving .
+      {values_clause('zaak', zaak_uris)}
+      ?zaak tk:beschrijving ?beschrijving .
       OPTIONAL {{ ?zaak tk:besluitResultaat ?besluitResultaat . }}
       OPTIONAL {{ ?zaak tk:volgnummer ?volgnummer . }}
       OPTIONAL {{ ?zaak tk:indieningsDatum ?indieningsDatum . }}
-      OPTIONAL {{ ?zaak tk:besluitStemmingsoort ?besluitStemmingsoort . }}
+      OPTIONAL {{ ?zaak tk:besluitStemmingSoort ?besluitStemmingsoort . }}
       OPTIONAL {{ ?zaak tk:dossierNummer ?dossierNummer . }}
       OPTIONAL {{
         ?zaak tk:heeftOnderwerp ?onderwerpInst .
         ?onderwerpInst tk:onderwerpType ?onderwerp .
       }}
-
-      ?fractie a tk:Fractie ;
-               tk:naam ?fractieNaam .
-
-      # Use BIND to check vote for each fractie and assign a 1 or 0
-      BIND(IF(EXISTS {{ ?fractie tk:heeftVoorGestemd ?zaak }}, 1, 0) AS ?voor)
-      BIND(IF(EXISTS {{ ?fractie tk:heeftTegenGestemd ?zaak }}, 1, 0) AS ?tegen)
-      BIND(IF(EXISTS {{ ?fractie tk:heeftNietDeelgenomen ?zaak }}, 1, 0) AS ?nietDeelgenomen)
+      OPTIONAL {{ ?zaak tk:stemmingsOverzicht ?stemmingsOverzicht . }}
     }}
-    GROUP BY ?fractieNaam ?beschrijving ?onderwerp ?besluitResultaat
-             ?volgnummer ?indieningsDatum ?besluitStemmingsoort ?dossierNummer
-    ORDER BY ?fractieNaam
+    LIMIT 1
     """
-    results = get_db_results(query)
+    results = get_db_columns(query, {
+        'beschrijving': Column(str),
+        'besluitResultaat': Column(str, 'Nog niet bekend'),
+        'onderwerp': Column(str, 'Niet bekend'),
+        'volgnummer': Column(str, 'Niet bekend'),
+        'indieningsDatum': Column(str, 'Niet bekend'),
+        'besluitStemmingsoort': Column(str, 'Niet bekend'),
+        'dossierNummer': Column(str, 'Niet bekend'),
+        'stemmingsOverzicht': Column(str),
+    })
 
     stemmingen = []
     zaak_info = {}
-    bindings = results['results']['bindings']
 
-    if bindings:
-        # Get zaak info from the first result
+    if len(results):
+        zaak = dict(zip(results.schema, next(iter(results))))
         zaak_info = {
-            'beschrijving': bindings[0]['beschrijving']['value'],
-            'resultaat': bindings[0].get('besluitResultaat', {}).get('value', 'Nog niet bekend'),
-            'onderwerp': bindings[0].get('onderwerp', {}).get('value', 'Niet bekend'),
-            'volgnummer': bindings[0].get('volgnummer', {}).get('value', 'Niet bekend'),
-            'indieningsDatum': bindings[0].get('indieningsDatum', {}).get('value', 'Niet bekend'),
-            'besluitStemmingsoort': bindings[0].get('besluitStemmingsoort', {}).get('value', 'Niet bekend'),
-            'dossierNummer': bindings[0].get('dossierNummer', {}).get('value', 'Niet bekend'),
+            'beschrijving': zaak['beschrijving'],
+            'resultaat': zaak['besluitResultaat'],
+            'onderwerp': zaak['onderwerp'],
+            'volgnummer': zaak['volgnummer'],
+            'indieningsDatum': zaak['indieningsDatum'],
+            'besluitStemmingsoort': zaak['besluitStemmingsoort'],
+            'dossierNummer': zaak['dossierNummer'],
         }
-        # Get voting data for each party
-        for result in bindings:
+
+        if zaak['stemmingsOverzicht'] is not None:
+            stemmen = json.loads(zaak['stemmingsOverzicht'])
+        else:
+            # Zaken uploaded before the scraper wrote tk:stemmingsOverzicht
+            stemmen = get_fractie_stemmen(zaak_uris)
+
+        # Every fractie gets a row, also the ones that did not vote
+        for fractie in get_fractie_namen():
+            stem = stemmen.get(fractie)
             stemmingen.append({
-                'fractie': result['fractieNaam']['value'],
-                'voor': int(result['stemmenVoor']['value']),
-                'tegen': int(result['stemmenTegen']['value']),
-                'niet_deelgenomen': int(result['stemmenNietDeelgenomen']['value']),
+                'fractie': fractie,
+                'voor': int(stem == 'Voor'),
+                'tegen': int(stem == 'Tegen'),
+                'niet_deelgenomen': int(stem == 'Niet Deelgenomen'),
             })
 
     return render_template('zaak_detail.html', zaak_info=zaak_info, stemmingen=stemmingen)
 
 
-@app.route('/persoon/<path:persoon_naam>')
-def persoon_detail(persoon_naam):
-    decoded_persoon_naam = unquote(persoon_naam)
+def get_fractie_namen():
+    """The names of all fracties, sorted."""
 
-    person_topic_query = f"""
+    query = """
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    SELECT DISTINCT ?fractieNaam WHERE {
+        ?fractie a tk:Fractie ;
+                 tk:naam ?fractieNaam .
+    }
+    ORDER BY ?fractieNaam
+    """
+    return get_db_columns(query, {
+        'fractieNaam': Column(str),
+    })['fractieNaam']
+
+
+def get_fractie_stemmen(zaak_uris):
+    """The keuze of every fractie that voted on a zaak, by fractie naam."""
+
+    query = f"""
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    SELECT ?fractieNaam ?stem WHERE {{
+      VALUES (?voteProperty ?stem) {{
+        (tk:heeftVoorGestemd "Voor")
+        (tk:heeftTegenGestemd "Tegen")
+        (tk:heeftNietDeelgenomen "Niet Deelgenomen")
+      }}
+      {values_clause('zaak', zaak_uris)}
+      ?fractie ?voteProperty ?zaak ;
+               a tk:Fractie ;
+               tk:naam ?fractieNaam .
+    }}
+    """
+    return dict(get_db_columns(query, {
+        'fractieNaam': Column(str),
+        'stem': Column(str),
+    }))
+
+
+def get_actor_profiel(actor_uris):
+    """
+    The votes per onderwerp, the recent zaken and the cohesie of a fractie
+    or persoon, from the tk:profiel the scraper computed, or from the
+    votes if the actor has no profiel (yet). The cohesie is only in the
+    profielen.
+    """
+
+    query = f"""
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    SELECT ?profiel WHERE {{
+      {values_clause('actor', actor_uris)}
+      ?actor tk:profiel ?profiel .
+    }}
+    """
+    profielen = [
+        json.loads(profiel)
+        for profiel in get_db_columns(query, {
+            'profiel': Column(str),
+        })['profiel']
+    ]
+    if not profielen or len(profielen) != len(actor_uris):
+        return query_actor_profiel(actor_uris)
+
+    # Names do not have to be unique, so combine the profielen of all
+    # actoren with the name
+    profiel = profielen[0]
+    for other in profielen[1:]:
+        for onderwerp, votes in other['onderwerp_votes'].items():
+            counts = profiel['onderwerp_votes'].setdefault(
+                onderwerp, dict.fromkeys(votes, 0),
+            )
+            for keuze, aantal in votes.items():
+                counts[keuze] += aantal
+        profiel['recent_zaken'] += other['recent_zaken']
+        profiel['cohesie'] = profiel.get('cohesie') or other.get('cohesie')
+
+    profiel['onderwerp_votes'] = dict(
+        sorted(profiel['onderwerp_votes'].items()),
+    )
+    recent_zaken = sorted(
+        profiel['recent_zaken'], key=lambda zaak: zaak['nummer'],
+    )
+    recent_zaken.sort(
+        key=lambda zaak: (zaak['datum'] is not None, zaak['datum'] or ''),
+        reverse=True,
+    )
+    # A zaak both actoren voted on is listed once
+    seen = set()
+    profiel['recent_zaken'] = [
+        zaak for zaak in recent_zaken
+        if zaak['nummer'] not in seen and not seen.add(zaak['nummer'])
+    ][:10]
+    return profiel
+
+
+def query_actor_profiel(actor_uris):
+    """The profiel of a fractie or persoon, aggregated from its votes."""
+
+    actor_values = values_clause('actor', actor_uris)
+
+    query = f"""
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
 
     SELECT ?onderwerpType (COUNT(DISTINCT ?zaakVoor) AS ?stemmenVoor) (COUNT(DISTINCT ?zaakTegen) AS ?stemmenTegen) (COUNT(DISTINCT ?zaakNietDeelgenomen) AS ?stemmenNietDeelgenomen)
     WHERE {{
-      ?persoon a tk:Persoon ;
-               tk:naam "{decoded_persoon_naam}" .
+      # The fractie or persoon, found by name in the entity index
+      {actor_values}
 
+      # Use a VALUES block to define the vote types we are interested in
       VALUES ?voteProperty {{ tk:heeftVoorGestemd tk:heeftTegenGestemd tk:heeftNietDeelgenomen }}
 
-      ?persoon ?voteProperty ?zaak .
+      # Find all zaken the actor has voted on
+      ?actor ?voteProperty ?zaak .
 
+      # Get the onderwerp for each zaak
       ?zaak tk:heeftOnderwerp ?onderwerp .
       ?onderwerp tk:onderwerpType ?onderwerpType .
 
+      # Use BIND to conditionally link zaken to vote types for counting.
       BIND(IF(?voteProperty = tk:heeftVoorGestemd, ?zaak, 1/0) AS ?zaakVoor)
       BIND(IF(?voteProperty = tk:heeftTegenGestemd, ?zaak, 1/0) AS ?zaakTegen)
       BIND(IF(?voteProperty = tk:heeftNietDeelgenomen, ?zaak, 1/0) AS ?zaakNietDeelgenomen)
@@ -851,80 +1592,129 @@ def persoon_detail(persoon_naam):
     ORDER BY ?onderwerpType
     """
 
-    topic_results = get_db_results(person_topic_query)
+    results = get_db_columns(query, {
+        'onderwerpType': Column(str),
+        'stemmenVoor': Column(int, 0),
+        'stemmenTegen': Column(int, 0),
+        'stemmenNietDeelgenomen': Column(int, 0),
+    })
 
     onderwerp_votes = {}
-    total_votes = {'voor': 0, 'tegen': 0, 'niet_deelgenomen': 0}
-
-    for result in topic_results['results']['bindings']:
-        onderwerp = result['onderwerpType']['value']
-        voor = int(result['stemmenVoor']['value'])
-        tegen = int(result['stemmenTegen']['value'])
-        niet_deelgenomen = int(result['stemmenNietDeelgenomen']['value'])
-
+    for onderwerp, voor, tegen, niet_deelgenomen in results:
         onderwerp_votes[onderwerp] = {
             'voor': voor,
             'tegen': tegen,
             'niet_deelgenomen': niet_deelgenomen,
         }
 
-        total_votes['voor'] += voor
-        total_votes['tegen'] += tegen
-        total_votes['niet_deelgenomen'] += niet_deelgenomen
-
-    recent_person_zaken_query = f"""
+    # Recent zaken the actor voted on (with their vote)
+    recent_zaken_query = f"""
     PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
     SELECT ?zaakNummer ?beschrijving ?datum (SUM(?voor) AS ?stemmenVoor) (SUM(?tegen) AS ?stemmenTegen) (SUM(?nietDeelgenomen) AS ?stemmenNietDeelgenomen)
     WHERE {{
-      ?persoon a tk:Persoon ;
-               tk:naam "{decoded_persoon_naam}" .
+      {actor_values}
 
       ?zaak a tk:Zaak ;
             tk:nummer ?zaakNummer ;
             tk:beschrijving ?beschrijving .
       OPTIONAL {{ ?zaak tk:indieningsDatum ?datum . }}
 
-      BIND(IF(EXISTS {{ ?persoon tk:heeftVoorGestemd ?zaak }}, 1, 0) AS ?voor)
-      BIND(IF(EXISTS {{ ?persoon tk:heeftTegenGestemd ?zaak }}, 1, 0) AS ?tegen)
-      BIND(IF(EXISTS {{ ?persoon tk:heeftNietDeelgenomen ?zaak }}, 1, 0) AS ?nietDeelgenomen)
+      FILTER EXISTS {{
+        VALUES ?voteProperty {{
+            tk:heeftVoorGestemd
+            tk:heeftTegenGestemd
+            tk:heeftNietDeelgenomen
+        }}
+        ?actor ?voteProperty ?zaak .
+      }}
+
+      BIND(IF(EXISTS {{ ?actor tk:heeftVoorGestemd ?zaak }}, 1, 0) AS ?voor)
+      BIND(IF(EXISTS {{ ?actor tk:heeftTegenGestemd ?zaak }}, 1, 0) AS ?tegen)
+      BIND(
+        IF(EXISTS {{ ?actor tk:heeftNietDeelgenomen ?zaak }}, 1, 0)
+        AS ?nietDeelgenomen
+      )
     }}
     GROUP BY ?zaakNummer ?beschrijving ?datum
     ORDER BY DESC(?datum) ?zaakNummer
     LIMIT 10
     """
 
-    recent_results = get_db_results(recent_person_zaken_query)
+    recent_results = get_db_columns(recent_zaken_query, {
+        'zaakNummer': Column(str),
+        'beschrijving': Column(str),
+        'datum': Column(str),
+        'stemmenVoor': Column(int, 0),
+        'stemmenTegen': Column(int, 0),
+        'stemmenNietDeelgenomen': Column(int, 0),
+    })
 
     recent_zaken = []
-    for res in recent_results['results']['bindings']:
+    for (
+        nummer, beschrijving, datum,
+        stemmen_voor, stemmen_tegen, stemmen_niet,
+    ) in recent_results:
         vote_label = 'Onbekend'
-        stemmen_voor = int(res.get('stemmenVoor', {}).get('value', '0'))
-        stemmen_tegen = int(res.get('stemmenTegen', {}).get('value', '0'))
-        stemmen_niet = int(
-            res.get('stemmenNietDeelgenomen', {}).get('value', '0'),
-        )
-        if stemmen_voor == 1:
+        if stemmen_voor >= 1:
             vote_label = 'Voor'
-        elif stemmen_tegen == 1:
+        elif stemmen_tegen >= 1:
             vote_label = 'Tegen'
-        elif stemmen_niet == 1:
+        elif stemmen_niet >= 1:
             vote_label = 'Niet Deelgenomen'
 
         recent_zaken.append({
-            'nummer': res['zaakNummer']['value'],
-            'beschrijving': res['beschrijving']['value'],
-            'datum': res.get('datum', {}).get('value'),
+            'nummer': nummer,
+            'beschrijving': beschrijving,
+            'datum': datum,
             'vote': vote_label,
         })
 
+    return {
+        'onderwerp_votes': onderwerp_votes,
+        'recent_zaken': recent_zaken,
+        'cohesie': None,
+    }
+
+
+@app.route('/persoon/<path:persoon_naam>')
+def persoon_detail(persoon_naam):
+    decoded_persoon_naam = unquote(persoon_naam)
+
+    persoon_uris = entity_index.resolve('persoon', decoded_persoon_naam)
+    if not persoon_uris:
+        abort(404)
+
+    profiel = get_actor_profiel(persoon_uris)
+    onderwerp_votes = profiel['onderwerp_votes']
+    total_votes = {
+        keuze: sum(votes[keuze] for votes in onderwerp_votes.values())
+        for keuze in ('voor', 'tegen', 'niet_deelgenomen')
+    }
+
     return render_template(
         'persoon.html',
         persoon_naam=decoded_persoon_naam,
         total_votes=total_votes,
         onderwerp_votes=onderwerp_votes,
-        recent_zaken=recent_zaken,
+        recent_zaken=profiel['recent_zaken'],
+        cohesie=profiel.get('cohesie'),
     )
 
 
+def warm_up():
+    """
+    Build the indexes and render the heavy pages, e.g. when a worker
+    starts, so the first requests don't have to wait for them.
+    """
+
+    start = time.perf_counter()
+    for index in (entity_index, agreement_index, search_index):
+        index.get()
+    client = app.test_client()
+    for path in ['/agreement'] + [f'/data/{chart}' for chart in CHARTS]:
+        client.get(path)
+    logging.info(f'Warmed up in {time.perf_counter() - start:.1f}s')
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', debug=True)
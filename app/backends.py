@@ -0,0 +1,314 @@
+import contextlib
+import io
+import json
+import logging
+import re
+import threading
+from typing import cast
+from typing import Iterator
+from typing import Optional
+from urllib.error import HTTPError
+from urllib.error import URLError
+
+from rdflib import Graph
+from rdflib import Literal
+from rdflib import URIRef
+from rdflib.namespace import XSD
+from rdflib.query import ResultRow
+from rdflib.util import guess_format
+from SPARQLWrapper import JSON
+from SPARQLWrapper import SPARQLWrapper
+from SPARQLWrapper import TSV
+
+# The datatypes of the literals that `rows` returns as ints, floats and
+# bools, the values of all others are returned as strings
+INTEGER_TYPES = frozenset(str(XSD[t]) for t in (
+    'integer', 'int', 'long', 'short', 'byte', 'nonNegativeInteger',
+    'positiveInteger', 'nonPositiveInteger', 'negativeInteger',
+    'unsignedInt', 'unsignedLong', 'unsignedShort', 'unsignedByte',
+))
+FLOAT_TYPES = frozenset(str(XSD[t]) for t in ('decimal', 'double', 'float'))
+BOOLEAN_TYPE = str(XSD.boolean)
+
+# A term in a SPARQL TSV result: an IRI, a blank node, a literal with an
+# optional language or datatype, or a bare (Turtle style) number or bool
+TSV_TERM = re.compile(
+    r'<(?P<iri>[^>]*)>'
+    r'|_:(?P<bnode>\S+)'
+    r'|"(?P<literal>(?:[^"\\]|\\.)*)"(?:@[\w-]+|\^\^<(?P<datatype>[^>]*)>)?'
+    r'|(?P<bare>\S+)',
+)
+TSV_ESCAPES = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+TSV_ESCAPED_CHARACTERS = {
+    't': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f',
+}
+
+
+class QueryTimeout(Exception):
+    """A query took longer than its timeout and was stopped."""
+
+
+@contextlib.contextmanager
+def query_timeout(timeout: Optional[float]) -> Iterator[None]:
+    """Raise the timeouts of a query to the endpoint as `QueryTimeout`."""
+
+    try:
+        yield
+    except HTTPError as e:
+        # GraphDB answers a query it stopped with a 503
+        if e.code != 503:
+            raise
+        raise QueryTimeout(f'The query took longer than {timeout}s') from e
+    except URLError as e:
+        if not isinstance(e.reason, TimeoutError):
+            raise
+        raise QueryTimeout(f'The query took longer than {timeout}s') from e
+    except TimeoutError as e:
+        raise QueryTimeout(f'The query took longer than {timeout}s') from e
+
+
+def sparql_literal(value: str) -> str:
+    """`value` as a quoted SPARQL string literal."""
+
+    escaped = (
+        value.replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+    return f'"{escaped}"'
+
+
+def values_clause(variable: str, uris: list[str]) -> str:
+    """A VALUES block that binds `variable` to each of `uris`."""
+
+    return f'VALUES ?{variable} {{ ' + ' '.join(
+        f'<{uri}>' for uri in uris
+    ) + ' }'
+
+
+def typed_value(value: str, datatype: str | None = None):
+    """The Python value of a literal: an int, float, bool or string."""
+
+    if datatype in INTEGER_TYPES:
+        return int(value)
+    if datatype in FLOAT_TYPES:
+        return float(value)
+    if datatype == BOOLEAN_TYPE:
+        return value in ('true', '1')
+    return value
+
+
+def _unescape(match: re.Match) -> str:
+    code = match.group(1) or match.group(2)
+    if code:
+        return chr(int(code, 16))
+    return TSV_ESCAPED_CHARACTERS.get(match.group(3), match.group(3))
+
+
+def parse_tsv_term(term: str):
+    """The value of a term in a TSV result, None if it is unbound."""
+
+    if not term:
+        return None
+
+    match = TSV_TERM.fullmatch(term)
+    if match is None or match.group('bare') is not None:
+        # Numbers and booleans can be written without quotes
+        if term in ('true', 'false'):
+            return term == 'true'
+        try:
+            return int(term)
+        except ValueError:
+            pass
+        try:
+            return float(term)
+        except ValueError:
+            return term
+    if match.group('iri') is not None:
+        return match.group('iri')
+    if match.group('bnode') is not None:
+        return match.group('bnode')
+    return typed_value(
+        TSV_ESCAPES.sub(_unescape, match.group('literal')),
+        match.group('datatype'),
+    )
+
+
+class GraphDBBackend:
+    """
+    Answers queries with a remote SPARQL endpoint, e.g. GraphDB.
+
+    A query that takes longer than its `timeout` (in seconds, None for no
+    timeout) raises `QueryTimeout`. The timeout is also sent to GraphDB,
+    so it stops the query instead of running it to the end.
+    """
+
+    def __init__(self, endpoint: str, timeout: Optional[float] = None):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def _sparql(self, query: str, timeout: Optional[float]) -> SPARQLWrapper:
+        sparql = SPARQLWrapper(self.endpoint)
+
+        sparql.setQuery(query)
+        if timeout:
+            # The socket timeout, and the query timeout of GraphDB (both
+            # in whole seconds)
+            seconds = max(1, round(timeout))
+            sparql.setTimeout(seconds)
+            sparql.addParameter('timeout', str(seconds))
+
+        return sparql
+
+    def query(self, query: str, timeout: Optional[float] = None) -> dict:
+        timeout = timeout or self.timeout
+        sparql = self._sparql(query, timeout)
+        sparql.setReturnFormat(JSON)
+
+        with query_timeout(timeout):
+            # A JSON result is converted to a dict
+            return cast(dict, sparql.query().convert())
+
+    def rows(
+        self,
+        query: str,
+        variables: list[str],
+        timeout: Optional[float] = None,
+    ) -> Iterator[tuple]:
+        """
+        The rows of a SELECT query as tuples of the values of `variables`
+        (None if unbound), parsed line by line as the (TSV) result
+        arrives instead of all at once. Numbers and booleans are
+        converted, all other values are strings (URIs without <>).
+        """
+
+        timeout = timeout or self.timeout
+        sparql = self._sparql(query, timeout)
+        sparql.setReturnFormat(TSV)
+
+        with query_timeout(timeout):
+            response = sparql.query().response
+            try:
+                lines = io.TextIOWrapper(
+                    response, encoding='utf-8', newline='\n',
+                )
+                header = next(lines, '').rstrip('\n').split('\t')
+                positions = {
+                    var.lstrip('?$'): i for i, var in enumerate(header)
+                }
+                columns = [positions.get(var) for var in variables]
+                for line in lines:
+                    terms = line.rstrip('\n').split('\t')
+                    yield tuple(
+                        parse_tsv_term(terms[i]) if i is not None else None
+                        for i in columns
+                    )
+            finally:
+                response.close()
+
+
+def _term_value(term):
+    if isinstance(term, Literal):
+        datatype = str(term.datatype) if term.datatype else None
+        return typed_value(str(term), datatype)
+    if isinstance(term, URIRef):
+        return str(term)
+    return str(term) if term is not None else None
+
+
+class EmbeddedBackend:
+    """
+    Answers queries from an in-process rdflib store.
+
+    The results have the same (SPARQL JSON) format as those of
+    `GraphDBBackend`, so the routes do not know which backend they use.
+    There is no reasoning, the scraper writes all the triples the
+    queries need explicitly. rdflib can not stop a running query, so the
+    timeouts of the queries are ignored.
+    """
+
+    def __init__(self, graph: Graph | None = None):
+        self.graph = Graph()
+        if graph is not None:
+            self.add(graph)
+
+    @classmethod
+    def load(cls, paths: list[str]) -> 'EmbeddedBackend':
+        """Load Turtle, N-Triples or other RDF files into a new store."""
+
+        backend = cls()
+        for path in paths:
+            logging.info(f'Loading {path} into the embedded store...')
+            g = Graph()
+            g.parse(path, format=guess_format(path) or 'turtle')
+            backend.add(g)
+        logging.info(f'Loaded {len(backend.graph)} triples.')
+        return backend
+
+    def add(self, graph: Graph) -> None:
+        for s, p, o in graph:
+            # GraphDB treats "x" and "x"^^xsd:string as the same literal
+            # (RDF 1.1) but rdflib does not, and the queries use plain ones
+            if isinstance(o, Literal) and o.datatype == XSD.string:
+                o = Literal(str(o))
+            self.graph.add((s, p, o))
+
+    def query(self, query: str, timeout: Optional[float] = None) -> dict:
+        # Without a destination the results are returned as bytes
+        results = json.loads(
+            cast(bytes, self.graph.query(query).serialize(format='json')),
+        )
+
+        # rdflib returns a single empty row for an aggregate over no
+        # matches, where GraphDB returns no rows at all
+        results['results']['bindings'] = [
+            binding for binding in results['results']['bindings'] if binding
+        ]
+        return results
+
+    def rows(
+        self,
+        query: str,
+        variables: list[str],
+        timeout: Optional[float] = None,
+    ) -> Iterator[tuple]:
+        """Like `GraphDBBackend.rows`, row by row from the store."""
+
+        for row in self.graph.query(query):
+            # The rows of a SELECT query
+            row = cast(ResultRow, row)
+            values = tuple(_term_value(row.get(var)) for var in variables)
+            # See `query`, the empty row of an aggregate over no matches
+            if any(value is not None for value in values):
+                yield values
+
+
+_lock = threading.Lock()
+
+
+def get_backend(app):
+    """The backend selected by `SPARQL_BACKEND`, created on first use."""
+
+    backend = app.extensions.get('sparql_backend')
+    if backend is not None:
+        return backend
+
+    with _lock:
+        if 'sparql_backend' not in app.extensions:
+            if app.config['SPARQL_BACKEND'] == 'embedded':
+                backend = EmbeddedBackend.load(
+                    app.config['SPARQL_DATASET'].split(','),
+                )
+            elif app.config['SPARQL_BACKEND'] == 'graphdb':
+                backend = GraphDBBackend(
+                    app.config['SPARQL_ENDPOINT'],
+                    app.config.get('QUERY_TIMEOUT'),
+                )
+            else:
+                raise ValueError(
+                    f'Unknown SPARQL backend: {app.config["SPARQL_BACKEND"]}',
+                )
+            app.extensions['sparql_backend'] = backend
+
+    return app.extensions['sparql_backend']
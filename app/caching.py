@@ -0,0 +1,352 @@
+import collections
+import contextlib
+import datetime
+import fcntl
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import Optional
+
+# What `SharedCache.get` returns for a key it does not have
+MISSING = object()
+
+
+def code_version(root: str) -> str:
+    """
+    A hash of the code and the templates of the app in `root`, so the
+    validators of the pages change when the app is updated.
+    """
+
+    paths = []
+    for directory, _, filenames in os.walk(root):
+        if os.path.relpath(directory, root).split(os.sep)[0] in (
+            'static', 'exports', '__pycache__',
+        ):
+            continue
+        paths += [
+            os.path.join(directory, filename) for filename in filenames
+            if filename.endswith(('.py', '.html'))
+        ]
+
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, root).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def validators(
+    code: str,
+    data_version: str,
+) -> tuple[str, Optional[datetime.datetime]]:
+    """
+    The ETag and Last-Modified of the pages for a data version (the time
+    of the last upload of the scraper).
+    """
+
+    digest = hashlib.sha1(data_version.encode('utf-8')).hexdigest()
+    etag = f'{code}-{digest[:12]}'
+    try:
+        last_modified = datetime.datetime.fromisoformat(data_version)
+    except ValueError:
+        return etag, None
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=datetime.timezone.utc)
+    return etag, last_modified
+
+
+class PageCache:
+    """
+    The last rendered version of pages, served stale while they are
+    rendered again in the background.
+
+    A page is rendered again when the data version changed since it was
+    rendered or it is older than `max_age` seconds. Until then the
+    previous version is served, so only the first request for a page
+    waits for it to render. At most `size` pages are kept, the least
+    recently used ones are dropped.
+
+    With a `shared` cache the pages are also shared with the other worker
+    processes of the app.
+    """
+
+    def __init__(
+        self,
+        size: int = 256,
+        max_age: float = 3600,
+        shared: Optional['SharedCache'] = None,
+    ):
+        self.size = size
+        self.max_age = max_age
+        self.shared = shared
+        # key -> (data version, rendered at, page)
+        self._pages: collections.OrderedDict = collections.OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='page-cache',
+        )
+
+    def get(
+        self,
+        key: str,
+        version: Optional[str],
+        render: Callable[[], Any],
+    ) -> tuple[Any, Optional[str]]:
+        """
+        The page for `key`, rendered with `render` if it has none, and the
+        data version it was rendered for (an older one while it is
+        rendered again).
+        """
+
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is not None:
+                self._pages.move_to_end(key)
+
+        if cached is None:
+            page = self._render(key, version, render)
+            self._store(key, version, page)
+            return page, version
+
+        cached_version, rendered_at, page = cached
+        if (
+            cached_version != version
+            or time.monotonic() - rendered_at >= self.max_age
+        ):
+            self._refresh(key, version, render)
+        return page, cached_version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+    def _render(
+        self,
+        key: str,
+        version: Optional[str],
+        render: Callable[[], Any],
+    ) -> Any:
+        # Another worker can have rendered the page already
+        if self.shared is None:
+            return render()
+        return self.shared.fetch(('page', key), version, render)
+
+    def _store(self, key: str, version: Optional[str], page: Any) -> None:
+        with self._lock:
+            self._pages[key] = (version, time.monotonic(), page)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.size:
+                self._pages.popitem(last=False)
+
+    def _refresh(
+        self,
+        key: str,
+        version: Optional[str],
+        render: Callable[[], Any],
+    ) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._store(key, version, self._render(key, version, render))
+            except Exception:
+                # Keep serving the previous version
+                logging.exception(f'Error rendering {key} again')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+
+class SingleFlight:
+    """
+    Runs a function once for concurrent calls with the same key: the
+    calls that come in while it runs wait for it and share its result
+    (or exception), instead of all running it.
+
+    The result is shared, so the callers must not modify it.
+    """
+
+    class _Call:
+        def __init__(self) -> None:
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self) -> None:
+        self._calls: dict[Any, SingleFlight._Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function: Callable[[], Any]) -> Any:
+        with self._lock:
+            running = key in self._calls
+            if running:
+                call = self._calls[key]
+            else:
+                call = self._calls[key] = self._Call()
+
+        if running:
+            call.done.wait()
+        else:
+            try:
+                call.result = function()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class LastResults:
+    """
+    The last results of queries, of any data version, to fall back on
+    when a query can not be answered (in time). At most `size` results
+    are kept, the least recently used ones are dropped.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self._results: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Any:
+        """The last results of `key`, MISSING if there are none."""
+
+        with self._lock:
+            return self._results.get(key, MISSING)
+
+    def set(self, key, results: Any) -> None:
+        with self._lock:
+            self._results[key] = results
+            self._results.move_to_end(key)
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+
+
+class SharedCache:
+    """
+    A cache in a SQLite database that all worker processes of the app
+    share, so what one worker computed (query results, indexes, pages)
+    the others don't have to compute again.
+
+    The values are stored with the data version they were computed for
+    and only returned for that version, and for at most `max_age`
+    seconds. Reads go through a memory map of the database file, so
+    values that were read recently come from memory. The keys are in a
+    `namespace`, e.g. the version of the code that computed the values.
+    """
+
+    # The largest part of the database file that is memory-mapped
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    def __init__(self, path: str, max_age: float = 3600, namespace: str = ''):
+        self.path = path
+        self.max_age = max_age
+        self.namespace = namespace
+        self._local = threading.local()
+        self._pruned_version: Optional[str] = None
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, version TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, value BLOB NOT NULL)',
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection can only be used by the thread that made it
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute(f'PRAGMA mmap_size={self.MMAP_SIZE}')
+            self._local.db = db
+        return db
+
+    def _key(self, key) -> str:
+        return hashlib.sha1(
+            repr((self.namespace, key)).encode('utf-8'),
+        ).hexdigest()
+
+    def get(self, key, version: Optional[str]) -> Any:
+        """The value of `key` for `version`, MISSING if there is none."""
+
+        try:
+            row = self._connect().execute(
+                'SELECT value FROM cache '
+                'WHERE key = ? AND version = ? AND stored_at > ?',
+                (self._key(key), version or '', time.time() - self.max_age),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f'Error reading the shared cache: {e}')
+            return MISSING
+        return pickle.loads(row[0]) if row is not None else MISSING
+
+    def set(self, key, version: Optional[str], value: Any) -> None:
+        """Store `value` as the value of `key` for `version`."""
+
+        try:
+            with self._connect() as db:
+                if version != self._pruned_version:
+                    # The values of older versions are not used anymore
+                    db.execute(
+                        'DELETE FROM cache '
+                        'WHERE version != ? OR stored_at <= ?',
+                        (version or '', time.time() - self.max_age),
+                    )
+                    self._pruned_version = version
+                db.execute(
+                    'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                    (
+                        self._key(key), version or '', time.time(),
+                        pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                    ),
+                )
+        except sqlite3.Error as e:
+            logging.warning(f'Error writing to the shared cache: {e}')
+
+    def fetch(
+        self,
+        key,
+        version: Optional[str],
+        compute: Callable[[], Any],
+    ) -> Any:
+        """The value of `key` for `version`, computed if there is none."""
+
+        value = self.get(key, version)
+        if value is MISSING:
+            value = compute()
+            self.set(key, version, value)
+        return value
+
+    @contextlib.contextmanager
+    def lock(self, name: str) -> Iterator[None]:
+        """
+        Hold the lock `name` (across processes), e.g. so only one worker
+        builds an index and the others wait for it.
+        """
+
+        with open(f'{self.path}.{name}.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,31 @@
+import gzip
+import json
+from typing import Any
+
+import brotli  # type: ignore[import-untyped]
+
+# The encodings the responses can be compressed with, by preference
+ENCODINGS = ['br', 'gzip', 'identity']
+
+
+def encode_json(data: Any) -> dict[str, bytes]:
+    """
+    `data` as JSON in every encoding of ENCODINGS. The data only changes
+    with the data version, so it is compressed once (with the slowest,
+    best compression) and the encoded versions are cached.
+    """
+
+    body = json.dumps(
+        data, ensure_ascii=False, separators=(',', ':'),
+    ).encode('utf-8')
+    return {
+        'br': brotli.compress(body, mode=brotli.MODE_TEXT),
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'identity': body,
+    }
+
+
+def best_encoding(accept_encodings) -> str:
+    """The encoding of ENCODINGS that the client prefers."""
+
+    return accept_encodings.best_match(ENCODINGS, default='identity')
@@ -0,0 +1,74 @@
+import csv
+import gzip
+import io
+import json
+import os
+from typing import Iterable
+from typing import Iterator
+
+# The formats of the exports and their mimetypes
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def csv_lines(
+    columns: list[str],
+    rows: Iterable[tuple],
+) -> Iterator[str]:
+    """A header and the `rows` as CSV, one line at a time."""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # The header if there are no rows
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+def ndjson_lines(
+    columns: list[str],
+    rows: Iterable[tuple],
+) -> Iterator[str]:
+    """The `rows` as JSON objects, one per line."""
+
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+
+
+def export_lines(
+    format: str,
+    columns: list[str],
+    rows: Iterable[tuple],
+) -> Iterator[str]:
+    """The `rows` in the export `format` ('csv' or 'ndjson')."""
+
+    if format == 'csv':
+        return csv_lines(columns, rows)
+    if format == 'ndjson':
+        return ndjson_lines(columns, rows)
+    raise ValueError(f'Unknown export format: {format}')
+
+
+def write_snapshot(path: str, lines: Iterable[str]) -> int:
+    """
+    Write `lines` gzip compressed to `path`, replacing the previous
+    snapshot only when the new one is complete. Returns the number of
+    lines.
+    """
+
+    n_lines = 0
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', newline='') as f:
+        for line in lines:
+            f.write(line)
+            n_lines += 1
+    os.replace(tmp_path, path)
+    return n_lines
@@ -0,0 +1,29 @@
+import logging
+import os
+import threading
+
+# The production server: `gunicorn -c gunicorn.conf.py app:app`. The
+# workers share their caches through SHARED_CACHE_PATH, and warm them up
+# when they start.
+
+os.environ.setdefault('SHARED_CACHE_PATH', '/tmp/tk-dashboard-cache.sqlite')
+
+logging.basicConfig(
+    level=logging.INFO, format='[%(process)d] %(levelname)s %(message)s',
+)
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', 8))
+# Building the indexes for a new data version can take a while
+timeout = 120
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    from app import warm_up
+
+    # In the background, so the worker already answers the requests
+    # that don't need what is warmed up
+    threading.Thread(target=warm_up, daemon=True).start()
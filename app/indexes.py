@@ -0,0 +1,617 @@
+import bisect
+import datetime
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+
+import numpy as np
+from backends import QueryTimeout
+from results import Column
+from results import ResultSet
+
+DATA_VERSION_QUERY = """
+PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+SELECT ?version WHERE { tk:dataset tk:dataVersion ?version . }
+"""
+
+# The subjects the detail routes are looked up by: the URIs of all
+# fracties and personen by naam and of all zaken by nummer
+ENTITY_QUERIES = {
+    'fractie': """
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    SELECT ?key ?entity WHERE { ?entity a tk:Fractie ; tk:naam ?key . }
+    """,
+    'persoon': """
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    SELECT ?key ?entity WHERE { ?entity a tk:Persoon ; tk:naam ?key . }
+    """,
+    'zaak': """
+    PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+    SELECT ?key ?entity WHERE { ?entity a tk:Zaak ; tk:nummer ?key . }
+    """,
+}
+
+# The voor and tegen votes of all fracties, with the date and the topics of
+# the zaak, for the agreement between the fracties
+AGREEMENT_VOTES_QUERY = """
+PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+SELECT ?afkorting ?keuze ?zaak ?datum WHERE {
+    VALUES (?voteProperty ?keuze) {
+        (tk:heeftVoorGestemd "voor")
+        (tk:heeftTegenGestemd "tegen")
+    }
+    ?fractie ?voteProperty ?zaak ;
+             a tk:Fractie ;
+             tk:afkorting ?afkorting .
+    ?zaak a tk:Zaak .
+    OPTIONAL { ?zaak tk:indieningsDatum ?datum . }
+}
+"""
+
+AGREEMENT_VOTES_SCHEMA = {
+    'afkorting': Column(str),
+    'keuze': Column(str),
+    'zaak': Column(str),
+    'datum': Column(str, ''),
+}
+
+AGREEMENT_TOPICS_QUERY = """
+PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+SELECT DISTINCT ?zaak ?topic WHERE {
+    ?zaak a tk:Zaak ;
+          tk:heeftOnderwerp ?onderwerp .
+    ?onderwerp tk:onderwerpType ?topic .
+}
+"""
+
+AGREEMENT_TOPICS_SCHEMA = {
+    'zaak': Column(str),
+    'topic': Column(str),
+}
+
+SEARCH_QUERY = """
+PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+SELECT ?zaak ?beschrijving WHERE {
+    ?zaak a tk:Zaak ;
+          tk:beschrijving ?beschrijving .
+}
+"""
+
+# Words too common in zaak beschrijvingen to search on
+STOPWORDS = frozenset('''
+aan als bij dat de deze die dit door een en er het hun in is met na naar
+niet of om ook op over te ten ter tot uit van voor wat wordt worden zijn
+'''.split())
+
+
+def normalize(text: str) -> str:
+    """`text` in lowercase and without accents."""
+
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list[str]:
+    """The normalized words of `text`, without stopwords."""
+
+    return [
+        token for token in re.findall(r'[a-z0-9]+', normalize(text))
+        if token not in STOPWORDS
+    ]
+
+
+class DataVersion:
+    """
+    The tk:dataVersion that the scraper sets after every upload.
+
+    The value is queried at most once every `interval` seconds, so it can
+    be checked on every request. If the query times out the last known
+    version is kept until the next check.
+    """
+
+    def __init__(self, query: Callable[[str], dict], interval: float = 30):
+        self.query = query
+        self.interval = interval
+        self._version: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[str]:
+        """The current version, None if the data has no version (yet)."""
+
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.interval:
+            with self._lock:
+                if (
+                    self._checked_at is None
+                    or now - self._checked_at >= self.interval
+                ):
+                    try:
+                        bindings = self.query(DATA_VERSION_QUERY)
+                    except QueryTimeout:
+                        if self._checked_at is None:
+                            raise
+                        logging.warning(
+                            'Timed out checking the data version, keeping '
+                            f'{self._version}',
+                        )
+                    else:
+                        bindings = bindings['results']['bindings']
+                        self._version = (
+                            bindings[0]['version']['value']
+                            if bindings else None
+                        )
+                    self._checked_at = time.monotonic()
+        return self._version
+
+
+class VersionedIndex:
+    """
+    An in-memory index of (part of) the data, built on first use and
+    rebuilt when the data version changes.
+
+    With a `shared` cache (see `caching.SharedCache`) an index is only
+    built by one of the worker processes of the app, the others load it.
+
+    If rebuilding the index times out the previous one is used until the
+    next try, at most once per check of the data version.
+    """
+
+    def __init__(
+        self,
+        rows: Callable[[str, list[str]], Iterable[tuple]],
+        version: DataVersion,
+        shared=None,
+    ):
+        # Streams the rows of a query, see `GraphDBBackend.rows`
+        self.rows = rows
+        self.version = version
+        self.shared = shared
+        self._index: Optional[dict] = None
+        self._index_version: Optional[str] = None
+        self._built = False
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _build(self):
+        raise NotImplementedError
+
+    def _shared_build(self, version: Optional[str]):
+        if self.shared is None:
+            return self._build()
+
+        name = type(self).__name__
+        with self.shared.lock(name):
+            return self.shared.fetch(('index', name), version, self._build)
+
+    def get(self):
+        """The index of the current data version."""
+
+        version = self.version.current()
+        if not self._built or self._outdated(version):
+            with self._lock:
+                if not self._built or self._outdated(version):
+                    try:
+                        self._index = self._shared_build(version)
+                    except QueryTimeout:
+                        if not self._built:
+                            raise
+                        logging.warning(
+                            f'Timed out building the {type(self).__name__} '
+                            f'of {version}, using that of '
+                            f'{self._index_version}',
+                        )
+                        self._retry_at = (
+                            time.monotonic() + self.version.interval
+                        )
+                    else:
+                        self._index_version = version
+                        self._built = True
+        return self._index
+
+    def _outdated(self, version: Optional[str]) -> bool:
+        return (
+            version != self._index_version
+            and time.monotonic() >= self._retry_at
+        )
+
+
+class EntityIndex(VersionedIndex):
+    """
+    Maps the names of fracties and personen and the nummers of zaken to
+    their URIs, so the routes can bind their subject directly instead of
+    matching a literal.
+
+    The names and nummers are also kept in a sorted list to complete
+    them, from the start of any of their words.
+    """
+
+    def _build(self) -> dict:
+        index = {}
+        for kind, query in ENTITY_QUERIES.items():
+            entities: dict[str, list[str]] = {}
+            for key, entity in self.rows(query, ['key', 'entity']):
+                entities.setdefault(key, []).append(entity)
+            index[kind] = entities
+
+        # (normalized text from a word on, kind, naam or nummer)
+        completions = sorted({
+            (' '.join(words[i:]), kind, key)
+            for kind, entities in index.items()
+            for key in entities
+            for words in [normalize(key).split()]
+            for i in range(len(words))
+        })
+
+        logging.info(
+            'Built the entity index: '
+            + ', '.join(f'{len(v)} {kind}' for kind, v in index.items()),
+        )
+        return {
+            'entities': index,
+            'completion_keys': [text for text, _, _ in completions],
+            'completions': [(kind, key) for _, kind, key in completions],
+        }
+
+    def resolve(self, kind: str, key: str) -> list[str]:
+        """
+        The URIs of the `kind` ('fractie', 'persoon' or 'zaak') with naam
+        or nummer `key`. Usually one, but names do not have to be unique.
+        """
+
+        return self.get()['entities'][kind].get(key, [])
+
+    def complete(self, prefix: str, limit: int = 10) -> list[tuple[str, str]]:
+        """
+        The (kind, naam or nummer) of at most `limit` fracties, personen
+        and zaken with a word that starts with `prefix`, ignoring case and
+        accents.
+        """
+
+        index = self.get()
+        prefix = ' '.join(normalize(prefix).split())
+        if not prefix:
+            return []
+
+        keys = index['completion_keys']
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + '\uffff', lo=start)
+
+        results = []
+        for i in range(start, end):
+            if index['completions'][i] not in results:
+                results.append(index['completions'][i])
+                if len(results) == limit:
+                    break
+        return results
+
+
+class AgreementIndex(VersionedIndex):
+    """
+    How often every pair of fracties voted the same, over any date range.
+
+    The voor and tegen votes of the fracties are kept in a matrix with the
+    zaken sorted by date. For every pair of fracties the running totals of
+    the zaken both voted on and agreed on are kept as well, so the
+    agreement over a date range is the difference of two of them.
+    """
+
+    def _build(self) -> dict:
+        votes_rows = ResultSet.from_rows(
+            AGREEMENT_VOTES_SCHEMA,
+            self.rows(AGREEMENT_VOTES_QUERY, list(AGREEMENT_VOTES_SCHEMA)),
+        )
+
+        fracties, vote_fracties = votes_rows.factorize('afkorting')
+        zaken, vote_zaken = votes_rows.factorize('zaak')
+
+        # The date of every zaak, '' if it has none
+        datums = np.zeros(len(zaken), dtype='U10')
+        datums[vote_zaken] = [datum[:10] for datum in votes_rows['datum']]
+
+        # Dated zaken first, by date, the undated ones only count in the
+        # agreement over all zaken
+        order = np.lexsort((datums, datums == ''))
+        zaak_positions = np.empty(len(zaken), dtype=np.int64)
+        zaak_positions[order] = np.arange(len(zaken))
+        dates = [datum for datum in datums[order].tolist() if datum]
+
+        # 1 for voor, 2 for tegen and 0 if the fractie did not vote
+        votes = np.zeros((len(fracties), len(zaken)), dtype=np.int8)
+        votes[vote_fracties, zaak_positions[vote_zaken]] = np.where(
+            votes_rows.array('keuze') == 'voor', 1, 2,
+        )
+
+        pairs = [
+            (a, b)
+            for a in range(len(fracties))
+            for b in range(a + 1, len(fracties))
+        ]
+        first = np.array([a for a, _ in pairs], dtype=np.int64)
+        second = np.array([b for _, b in pairs], dtype=np.int64)
+        common = (votes[first] > 0) & (votes[second] > 0)
+        agree = common & (votes[first] == votes[second])
+
+        def running_totals(matrix):
+            totals = np.zeros(
+                (matrix.shape[0], matrix.shape[1] + 1), dtype=np.int32,
+            )
+            np.cumsum(matrix, axis=1, out=totals[:, 1:])
+            return totals
+
+        topic_rows = ResultSet.from_rows(
+            AGREEMENT_TOPICS_SCHEMA,
+            self.rows(AGREEMENT_TOPICS_QUERY, list(AGREEMENT_TOPICS_SCHEMA)),
+        )
+        topics, zaak_topics = topic_rows.factorize('topic')
+        # Only the zaken the fracties voted on
+        zaak_idx = dict.fromkeys(topic_rows['zaak'], -1)
+        zaak_idx.update((zaak, i) for i, zaak in enumerate(zaken))
+        topic_zaken = np.fromiter(
+            map(zaak_idx.__getitem__, topic_rows['zaak']),
+            dtype=np.int64,
+            count=len(topic_rows),
+        )
+        voted = topic_zaken >= 0
+        topic_mask = np.zeros((len(topics), len(zaken)), dtype=bool)
+        topic_mask[
+            zaak_topics[voted], zaak_positions[topic_zaken[voted]],
+        ] = True
+
+        logging.info(
+            f'Built the agreement index: {len(fracties)} fracties, '
+            f'{len(zaken)} zaken',
+        )
+        return {
+            'fracties': fracties,
+            'pairs': [(fracties[a], fracties[b]) for a, b in pairs],
+            'dates': dates,
+            'n_zaken': len(zaken),
+            'common': common,
+            'agree': agree,
+            'common_totals': running_totals(common),
+            'agree_totals': running_totals(agree),
+            'topics': topics,
+            'topic_mask': topic_mask,
+        }
+
+    @staticmethod
+    def _range(
+        index: dict,
+        start: Optional[datetime.date],
+        end: Optional[datetime.date],
+    ) -> tuple[int, int]:
+        """The zaken from `start` up to and including `end`."""
+
+        if start is None and end is None:
+            return 0, index['n_zaken']
+        lo = (
+            0 if start is None
+            else bisect.bisect_left(index['dates'], start.isoformat())
+        )
+        hi = (
+            len(index['dates']) if end is None
+            else bisect.bisect_right(index['dates'], end.isoformat())
+        )
+        return lo, max(lo, hi)
+
+    @staticmethod
+    def _percentages(pairs, common, agree) -> dict[tuple[str, str], float]:
+        return {
+            pair: float(a) * 100.0 / float(c)
+            for pair, c, a in zip(pairs, common, agree)
+            if c
+        }
+
+    def fracties(self) -> list[str]:
+        """The afkortingen of the fracties that voted, sorted."""
+
+        return self.get()['fracties']
+
+    def agreement(
+        self,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> dict[tuple[str, str], float]:
+        """
+        The percentage of the zaken from `start` to `end` (all zaken if
+        both are None) two fracties voted on on which they voted the same,
+        by (afkorting, afkorting) with the first before the second.
+        """
+
+        index = self.get()
+        lo, hi = self._range(index, start, end)
+        return self._percentages(
+            index['pairs'],
+            index['common_totals'][:, hi] - index['common_totals'][:, lo],
+            index['agree_totals'][:, hi] - index['agree_totals'][:, lo],
+        )
+
+    def agreement_per_topic(
+        self,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> dict[str, dict[tuple[str, str], float]]:
+        """`agreement` for the zaken of every topic."""
+
+        index = self.get()
+        lo, hi = self._range(index, start, end)
+        mask = index['topic_mask'][:, lo:hi].T.astype(np.int32)
+        common = index['common'][:, lo:hi].astype(np.int32) @ mask
+        agree = index['agree'][:, lo:hi].astype(np.int32) @ mask
+        return {
+            topic: self._percentages(index['pairs'], common[:, i], agree[:, i])
+            for i, topic in enumerate(index['topics'])
+        }
+
+    def monthly_agreement(
+        self,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> tuple[list[str], dict[tuple[str, str], list[Optional[float]]]]:
+        """
+        The agreement of every pair of fracties per month (YYYY-MM) of the
+        dated zaken from `start` to `end`, None for months without zaken
+        both voted on.
+        """
+
+        index = self.get()
+        lo, hi = self._range(index, start, end)
+        dates = index['dates']
+
+        months = sorted({date[:7] for date in dates[lo:hi]})
+        bounds = [
+            bisect.bisect_left(dates, f'{month}-01', lo, hi)
+            for month in months
+        ] + [hi]
+        common = np.diff(index['common_totals'][:, bounds], axis=1)
+        agree = np.diff(index['agree_totals'][:, bounds], axis=1)
+
+        series = {}
+        for i, pair in enumerate(index['pairs']):
+            series[pair] = [
+                float(a) * 100.0 / float(c) if c else None
+                for c, a in zip(common[i], agree[i])
+            ]
+        return months, series
+
+
+class SearchIndex(VersionedIndex):
+    """
+    An inverted index of the beschrijvingen of the zaken, ranked with
+    BM25.
+
+    When the data version changes only the zaken that were added, changed
+    or removed are (re)indexed. A search term also matches the words it
+    is a prefix of, so "boer" finds "boeren".
+    """
+
+    # The BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    # The number of words a search term can expand to
+    MAX_EXPANSIONS = 50
+
+    def _build(self) -> dict:
+        docs: dict[str, str] = {}
+        for zaak, beschrijving in self.rows(
+            SEARCH_QUERY, ['zaak', 'beschrijving'],
+        ):
+            docs[zaak] = (
+                docs[zaak] + ' ' + beschrijving if zaak in docs
+                else beschrijving
+            )
+
+        previous = self._index or {
+            'docs': {}, 'postings': {}, 'lengths': {}, 'total_length': 0,
+        }
+        old_docs = previous['docs']
+
+        # Copy what changes, searches can still be using the previous index
+        postings = dict(previous['postings'])
+        lengths = dict(previous['lengths'])
+        total_length = previous['total_length']
+        copied = set()
+
+        def posting(token):
+            if token not in copied:
+                postings[token] = dict(postings.get(token, {}))
+                copied.add(token)
+            return postings[token]
+
+        changed = [
+            zaak for zaak in docs.keys() | old_docs.keys()
+            if docs.get(zaak) != old_docs.get(zaak)
+        ]
+        for zaak in changed:
+            if zaak in old_docs:
+                for token in set(tokenize(old_docs[zaak])):
+                    del posting(token)[zaak]
+                    if not postings[token]:
+                        del postings[token]
+                total_length -= lengths.pop(zaak)
+            if zaak in docs:
+                tokens = tokenize(docs[zaak])
+                for token in tokens:
+                    counts = posting(token)
+                    counts[zaak] = counts.get(zaak, 0) + 1
+                lengths[zaak] = len(tokens)
+                total_length += len(tokens)
+
+        if changed or self._index is None:
+            logging.info(
+                f'Updated the search index: {len(changed)} of {len(docs)} '
+                'zaken (re)indexed',
+            )
+        return {
+            'docs': docs,
+            'postings': postings,
+            'lengths': lengths,
+            'total_length': total_length,
+            'vocabulary': (
+                sorted(postings) if changed or self._index is None
+                else previous['vocabulary']
+            ),
+        }
+
+    def search(self, query: str, limit: int = 500) -> Optional[list[str]]:
+        """
+        The URIs of the (at most `limit`) zaken whose beschrijving has
+        all words of `query`, best match first. None if `query` has no
+        words to search for (e.g. only stopwords), so nothing is filtered.
+        """
+
+        terms = tokenize(query)
+        if not terms:
+            return None
+        index = self.get()
+        if not index['lengths']:
+            return []
+
+        n_docs = len(index['lengths'])
+        avg_length = index['total_length'] / n_docs or 1
+        vocabulary = index['vocabulary']
+
+        scores: Optional[dict[str, float]] = None
+        for term in dict.fromkeys(terms):
+            start = bisect.bisect_left(vocabulary, term)
+            end = bisect.bisect_left(vocabulary, term + '\uffff')
+            words = vocabulary[start:min(end, start + self.MAX_EXPANSIONS)]
+
+            # The best matching word of the term counts for every zaak
+            term_scores: dict[str, float] = {}
+            for word in words:
+                docs = index['postings'][word]
+                idf = math.log(
+                    1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5),
+                )
+                for zaak, tf in docs.items():
+                    norm = 1 - self.B + self.B * (
+                        index['lengths'][zaak] / avg_length
+                    )
+                    score = idf * tf * (self.K1 + 1) / (tf + self.K1 * norm)
+                    if score > term_scores.get(zaak, 0):
+                        term_scores[zaak] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    zaak: score + term_scores[zaak]
+                    for zaak, score in scores.items()
+                    if zaak in term_scores
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(
+            (scores or {}).items(), key=lambda item: (-item[1], item[0]),
+        )
+        return [zaak for zaak, _ in ranked[:limit]]
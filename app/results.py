@@ -0,0 +1,114 @@
+import datetime
+import itertools
+import operator
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+
+import numpy as np
+
+# The number of rows that are decoded at a time
+BATCH_SIZE = 10000
+
+# The NumPy dtypes of the column types, other columns are object arrays
+DTYPES: dict[type, Any] = {
+    int: np.int64,
+    float: np.float64,
+    bool: np.bool_,
+    datetime.date: 'datetime64[D]',
+}
+
+
+class Column(NamedTuple):
+    """The type of a variable in a result set and its value if unbound."""
+
+    type: type = str
+    default: Any = None
+
+
+def decode(value, column: Column):
+    """A value of a result row as the type of its `column`."""
+
+    if value is None:
+        return column.default
+    if isinstance(value, column.type) and not isinstance(value, bool):
+        return value
+    if column.type is datetime.date:
+        # Dates can also be xsd:dateTimes, the time is ignored
+        return datetime.date.fromisoformat(str(value)[:10])
+    return column.type(value)
+
+
+class ResultSet:
+    """
+    The results of a query decoded once into a typed column per variable,
+    by a schema of {variable: Column}.
+
+    Iterating over a result set gives its rows as tuples in the order of
+    the schema, `rs['variable']` a column as a list and
+    `rs.array('variable')` as a NumPy array.
+    """
+
+    def __init__(self, schema: dict[str, Column], columns: dict[str, list]):
+        self.schema = schema
+        self.columns = columns
+
+    @classmethod
+    def from_rows(
+        cls,
+        schema: dict[str, Column],
+        rows: Iterable[tuple],
+    ) -> 'ResultSet':
+        """Decode `rows` with the values of the variables of `schema`."""
+
+        columns: dict[str, list] = {variable: [] for variable in schema}
+        rows = iter(rows)
+        while batch := list(itertools.islice(rows, BATCH_SIZE)):
+            for i, (variable, column) in enumerate(schema.items()):
+                values = list(map(operator.itemgetter(i), batch))
+                # The backends already convert most values
+                if set(map(type, values)) <= {column.type}:
+                    columns[variable].extend(values)
+                else:
+                    columns[variable].extend(
+                        decode(value, column) for value in values
+                    )
+        return cls(schema, columns)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    def __iter__(self) -> Iterator[tuple]:
+        return zip(*self.columns.values())
+
+    def __getitem__(self, variable: str) -> list:
+        return self.columns[variable]
+
+    def factorize(self, variable: str) -> tuple[list, np.ndarray]:
+        """
+        The distinct values of a column, sorted, and the position in them
+        of the value of every row.
+        """
+
+        column = self.columns[variable]
+        values = sorted(dict.fromkeys(column))
+        positions = {value: i for i, value in enumerate(values)}
+        codes = np.fromiter(
+            map(positions.__getitem__, column),
+            dtype=np.int64,
+            count=len(column),
+        )
+        return values, codes
+
+    def array(self, variable: str) -> np.ndarray:
+        """A column as a NumPy array."""
+
+        column = self.schema[variable]
+        if column.default is None and column.type is not str:
+            # Unbound values can not be stored in a typed array
+            if any(value is None for value in self.columns[variable]):
+                return np.array(self.columns[variable], dtype=object)
+        return np.array(
+            self.columns[variable], dtype=DTYPES.get(column.type, object),
+        )
@@ -0,0 +1,383 @@
+import argparse
+import importlib
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import cast
+from urllib.error import HTTPError
+from urllib.error import URLError
+from urllib.parse import parse_qs
+from urllib.parse import quote
+from urllib.parse import urlparse
+
+import synthetic  # noqa: F401 (sets up the import path for the app)
+from backends import EmbeddedBackend
+from rdflib import BNode
+from rdflib import Graph
+from rdflib import URIRef
+from rdflib.query import ResultRow
+from werkzeug.serving import make_server
+
+TK_PREFIX = (
+    'PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>'
+)
+
+
+def create_arg_parser():
+    """
+    Create the argument parser for the script.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=(
+            'Measure the latency and throughput of the dashboard routes '
+            'under concurrent clients.'
+        ),
+    )
+    parser.add_argument(
+        '--zaken',
+        type=int,
+        default=500,
+        help='Number of synthetic zaken to load.',
+    )
+    parser.add_argument(
+        '--dataset',
+        type=str,
+        help=(
+            'Load this Turtle/N-Triples file (e.g. a GraphDB export) '
+            'instead of synthetic data.'
+        ),
+    )
+    parser.add_argument(
+        '--backend',
+        choices=['graphdb', 'embedded'],
+        default='graphdb',
+        help=(
+            'Query a SPARQL endpoint over HTTP like with GraphDB, or the '
+            'embedded in-process store.'
+        ),
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='Number of concurrent clients.',
+    )
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=20,
+        help='Number of requests per route.',
+    )
+    parser.add_argument(
+        '--routes',
+        type=str,
+        nargs='+',
+        help='Only benchmark routes whose name contains one of these.',
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Write the results as JSON to this file.',
+    )
+
+    return parser.parse_args()
+
+
+def _tsv_term(term) -> str:
+    """A term of a SELECT result in the SPARQL TSV format."""
+
+    if term is None:
+        return ''
+    if isinstance(term, URIRef):
+        return f'<{term}>'
+    if isinstance(term, BNode):
+        return f'_:{term}'
+    escaped = (
+        str(term).replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+        .replace('\t', '\\t')
+    )
+    if term.language:
+        return f'"{escaped}"@{term.language}'
+    if term.datatype:
+        return f'"{escaped}"^^<{term.datatype}>'
+    return f'"{escaped}"'
+
+
+def tsv_results(backend: EmbeddedBackend, query: str) -> bytes:
+    """The results of a SELECT query as SPARQL TSV, like GraphDB sends."""
+
+    result = backend.graph.query(query)
+    variables = result.vars or []
+    lines = ['\t'.join(f'?{var}' for var in variables)]
+    for row in result:
+        # The rows of a SELECT query
+        row = cast(ResultRow, row)
+        terms = [row.get(var) for var in variables]
+        # See `EmbeddedBackend.query`, the empty row of an aggregate
+        if any(term is not None for term in terms):
+            lines.append('\t'.join(map(_tsv_term, terms)))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class SparqlHandler(BaseHTTPRequestHandler):
+    """
+    A minimal SPARQL endpoint in front of the embedded store, which
+    answers in TSV when the client accepts it and in JSON otherwise.
+    """
+
+    def _answer(self, query: str):
+        tsv = 'text/tab-separated-values' in self.headers.get('Accept', '')
+        try:
+            backend = cast(SparqlServer, self.server).backend
+            if tsv:
+                body = tsv_results(backend, query)
+            else:
+                body = json.dumps(backend.query(query)).encode()
+        except Exception as e:
+            self.send_error(400, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header(
+            'Content-Type',
+            'text/tab-separated-values; charset=utf-8' if tsv
+            else 'application/sparql-results+json',
+        )
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        self._answer(params['query'][0])
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode('utf-8')
+        if self.headers.get('Content-Type', '').startswith(
+            'application/sparql-query',
+        ):
+            self._answer(body)
+        else:
+            self._answer(parse_qs(body)['query'][0])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(server) -> str:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+class SparqlServer(ThreadingHTTPServer):
+    def __init__(self, backend: EmbeddedBackend):
+        super().__init__(('127.0.0.1', 0), SparqlHandler)
+        self.backend = backend
+
+
+def start_sparql_endpoint(backend: EmbeddedBackend) -> SparqlServer:
+    return SparqlServer(backend)
+
+
+def load_dataset(args) -> EmbeddedBackend:
+    if args.dataset:
+        return EmbeddedBackend.load([args.dataset])
+    return EmbeddedBackend(synthetic.build_graph(args.zaken))
+
+
+def _values(g: Graph, query: str) -> list[str]:
+    # The rows of a SELECT query
+    return [str(cast(ResultRow, row)[0]) for row in g.query(TK_PREFIX + query)]
+
+
+def build_routes(g: Graph) -> dict[str, str]:
+    """The routes to benchmark, with subjects picked from the dataset."""
+
+    fracties = _values(
+        g, 'SELECT ?naam WHERE { ?f a tk:Fractie ; tk:naam ?naam } '
+        'ORDER BY ?naam LIMIT 3',
+    )
+    personen = _values(
+        g, 'SELECT ?naam WHERE { ?p a tk:Persoon ; tk:naam ?naam } '
+        'ORDER BY ?naam LIMIT 3',
+    )
+    zaken = _values(
+        g, 'SELECT ?nummer WHERE { ?z a tk:Zaak ; tk:nummer ?nummer } '
+        'ORDER BY DESC(?nummer) LIMIT 3',
+    )
+    n_zaken = len(_values(g, 'SELECT ?z WHERE { ?z a tk:Zaak }'))
+
+    routes = {
+        'index': '/',
+        'agreement': '/agreement',
+        'fracties': '/fracties',
+        'zaken': '/zaken',
+        'zaken deep page': f'/zaken?page={max(n_zaken // 20 - 1, 1)}',
+        'zaken onderwerp': '/zaken?onderwerp_type=Klimaat+en+Energie',
+        'zaken resultaat': '/zaken?resultaat=Stemmen+-+aangenomen',
+        'zaken type': '/zaken?zaak_type=Motie',
+        'zaken datum': '/zaken?start_date=2025-03-01&end_date=2025-03-31',
+    }
+    # The index and agreement pages load the data of their charts
+    for chart in (
+        'zaken-per-type', 'topics-per-month', 'vote-behaviour', 'acceptance',
+        'agreement-trend', 'agreement-per-topic',
+    ):
+        routes[f'data {chart}'] = f'/data/{chart}'
+    for i, naam in enumerate(fracties):
+        routes[f'fractie {i}'] = f'/fractie/{quote(naam)}'
+    for i, naam in enumerate(personen):
+        routes[f'persoon {i}'] = f'/persoon/{quote(naam)}'
+    for i, nummer in enumerate(zaken):
+        routes[f'zaak {i}'] = f'/zaak/{quote(nummer)}'
+    return routes
+
+
+def check_routes(app_url: str, routes: dict[str, str]) -> dict[str, int]:
+    """The routes that are not answered with a 200, with their status."""
+
+    failed = {}
+    for name, path in routes.items():
+        try:
+            with urllib.request.urlopen(app_url + path) as response:
+                response.read()
+        except HTTPError as e:
+            failed[name] = e.code
+    return failed
+
+
+def _get(url: str) -> tuple[int, float]:
+    """The status (0 if there was no response) and latency of a request."""
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url) as response:
+            response.read()
+            status = response.status
+    except HTTPError as e:
+        status = e.code
+    except URLError:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def _percentile(latencies: list[float], percentile: int) -> float:
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100)[percentile - 1]
+
+
+def benchmark_route(url: str, n_requests: int, concurrency: int) -> dict:
+    # Warm up (template compilation, connection setup)
+    _get(url)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(_get, [url] * n_requests))
+    wall = time.perf_counter() - start
+
+    # Requests over EXPENSIVE_ROUTE_CONCURRENCY are shed with a 503. Error
+    # pages are counted too, but not in the latencies.
+    latencies = [latency for status, latency in results if status == 200]
+    shed = sum(status == 503 for status, _ in results)
+    requests_per_second = len(latencies) / wall
+    if not latencies:
+        latencies = [float('nan')]
+    return {
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p95_ms': _percentile(latencies, 95) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+        'requests_per_second': requests_per_second,
+        'shed': shed,
+        'errors': sum(status not in (200, 503) for status, _ in results),
+    }
+
+
+def main() -> int:
+
+    # Silence the request log of the app server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    args = create_arg_parser()
+
+    print('Loading dataset...')
+    backend = load_dataset(args)
+    g = backend.graph
+    print(f'Loaded {len(g)} triples')
+
+    # The app reads its configuration on import
+    os.environ['WIKIDATA_ENDPOINT'] = ''
+    # Measure all requests, unless the limit is set explicitly
+    os.environ.setdefault('EXPENSIVE_ROUTE_CONCURRENCY', str(args.concurrency))
+    if args.backend == 'graphdb':
+        os.environ['SPARQL_ENDPOINT'] = _serve(start_sparql_endpoint(backend))
+    # Imported by name, so mypy does not see app/app.py as `app.app` as well
+    app = importlib.import_module('app').app
+    if args.backend == 'embedded':
+        app.extensions['sparql_backend'] = backend
+
+    app_url = _serve(make_server('127.0.0.1', 0, app, threaded=True))
+
+    routes = build_routes(g)
+    if args.routes:
+        routes = {
+            name: path for name, path in routes.items()
+            if any(part in name for part in args.routes)
+        }
+
+    # Otherwise the benchmark measures error pages, e.g. when the app can
+    # not read the results of the endpoint
+    failed = check_routes(app_url, routes)
+    if failed:
+        for name, status in failed.items():
+            print(f'{name} ({routes[name]}) returned {status}')
+        return 1
+
+    print(
+        f'\n{"route":<20} {"p50 ms":>10} {"p95 ms":>10} {"p99 ms":>10} '
+        f'{"req/s":>8} {"shed":>6} {"errors":>6}',
+    )
+    results = {}
+    for name, path in routes.items():
+        result = benchmark_route(
+            app_url + path, args.requests, args.concurrency,
+        )
+        results[name] = {'path': path, **result}
+        print(
+            f'{name:<20} {result["p50_ms"]:>10.1f} {result["p95_ms"]:>10.1f} '
+            f'{result["p99_ms"]:>10.1f} {result["requests_per_second"]:>8.1f} '
+            f'{result["shed"]:>6} {result["errors"]:>6}',
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(
+                {
+                    'triples': len(g),
+                    'backend': args.backend,
+                    'concurrency': args.concurrency,
+                    'requests': args.requests,
+                    'routes': results,
+                },
+                f,
+                indent=2,
+            )
+
+    return 0
+
+
+if __name__ == '__main__':
+
+    raise SystemExit(main())
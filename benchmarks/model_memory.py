@@ -0,0 +1,152 @@
+import argparse
+import enum
+import gc
+import json
+import sys
+import tracemalloc
+import types
+from unittest import mock
+
+import synthetic
+from models import Actor
+
+DEFAULT_SCALES = [1_000, 10_000]
+
+
+def create_arg_parser():
+    """
+    Create the argument parser for the script.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=(
+            'Measure the memory the scraped models take per zaak and per '
+            'individual vote.'
+        ),
+    )
+    parser.add_argument(
+        '--scales',
+        type=int,
+        nargs='+',
+        default=DEFAULT_SCALES,
+        help='Numbers of synthetic zaken to scrape.',
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Write the results as JSON to this file.',
+    )
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        help='Compare against results written earlier with --output.',
+    )
+
+    return parser.parse_args()
+
+
+# Objects that are shared with the rest of the process and should not be
+# counted as part of the models
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, enum.Enum)
+
+
+def deep_size(roots, stop) -> int:
+    """
+    The number of bytes of `roots` and everything they refer to, counting
+    every object once. Objects for which `stop` is true are not counted
+    and not followed.
+    """
+
+    seen = set()
+    size = 0
+    todo = list(roots)
+    while todo:
+        obj = todo.pop()
+        if id(obj) in seen or isinstance(obj, _SKIPPED_TYPES) or stop(obj):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        todo.extend(gc.get_referents(obj))
+    return size
+
+
+def measure(n_zaken: int) -> dict:
+    api = synthetic.SyntheticApi(n_zaken)
+
+    # Decode every response again, like tkapi does for real responses, so
+    # the models get their own strings instead of those of the generator
+    request_json = api.request_json
+
+    def decoded_request_json(*args):
+        return json.loads(json.dumps(request_json(*args)))
+
+    # Everything the scrape leaves allocated, which are the models. This
+    # also counts the instance values that sys.getsizeof leaves out.
+    gc.collect()
+    tracemalloc.start()
+    with mock.patch.object(api, 'request_json', decoded_request_json):
+        fracties, zaken = api.scrape()
+    gc.collect()
+    model_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stemmingen = [
+        stemming for zaak in zaken for stemming in zaak.stemmingen
+    ]
+    n_votes = sum(len(stemming.resultaten) for stemming in stemmingen)
+
+    # Only the vote results themselves: the actors and keuzes they point
+    # to are shared by all stemmingen
+    vote_bytes = deep_size(
+        [stemming.resultaten for stemming in stemmingen],
+        stop=lambda obj: isinstance(obj, Actor),
+    )
+
+    return {
+        'zaken': len(zaken),
+        'votes': n_votes,
+        'bytes_per_zaak': model_bytes / len(zaken),
+        'bytes_per_vote': vote_bytes / n_votes,
+    }
+
+
+def main() -> int:
+
+    args = create_arg_parser()
+
+    results = {}
+    print(f'{"zaken":>8} {"votes":>10} {"bytes/zaak":>12} {"bytes/vote":>12}')
+    for n_zaken in args.scales:
+        result = measure(n_zaken)
+        results[f'synthetic {n_zaken}'] = result
+        print(
+            f'{result["zaken"]:>8} {result["votes"]:>10} '
+            f'{result["bytes_per_zaak"]:>12.0f} '
+            f'{result["bytes_per_vote"]:>12.1f}',
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print('\nCompared to the baseline:')
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            for metric in ('bytes_per_zaak', 'bytes_per_vote'):
+                before = baseline[name][metric]
+                print(
+                    f'  {name} {metric}: {before:.1f} -> '
+                    f'{result[metric]:.1f} '
+                    f'({(result[metric] - before) / before:+.0%})',
+                )
+
+    return 0
+
+
+if __name__ == '__main__':
+
+    raise SystemExit(main())
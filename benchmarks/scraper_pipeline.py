@@ -0,0 +1,315 @@
+import argparse
+import datetime
+import gc
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import cast
+
+import requests
+import synthetic  # noqa: F401 (sets up the import path for the scraper)
+from main import _upload_diff
+from models import ZaakSoort
+from rdflib import Graph
+from replay import replay
+from replay import restore
+from sync import SyncSnapshot
+
+from scraper import TkScraper
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+
+
+def create_arg_parser():
+    """
+    Create the argument parser for the script.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=(
+            'Measure the time and peak memory of every phase of the '
+            'scraper pipeline.'
+        ),
+    )
+    parser.add_argument(
+        '--scales',
+        type=int,
+        nargs='+',
+        default=DEFAULT_SCALES,
+        help='Numbers of synthetic zaken to run the pipeline with.',
+    )
+    parser.add_argument(
+        '--replay-api',
+        type=str,
+        metavar='DIR',
+        help=(
+            'Use TK API responses recorded with `main.py --record-api` '
+            'instead of synthetic data.'
+        ),
+    )
+    parser.add_argument(
+        '--start-date',
+        type=str,
+        default='2025-01-01',
+        help='The start date of the recorded data (YYYY-MM-DD).',
+    )
+    parser.add_argument(
+        '--end-date',
+        type=str,
+        default='2025-12-31',
+        help='The end date of the recorded data (YYYY-MM-DD).',
+    )
+    parser.add_argument(
+        '--no-memory',
+        action='store_true',
+        help='Do not trace memory, which makes the timings more accurate.',
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Write the results as JSON to this file.',
+    )
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        help='Compare against results written earlier with --output.',
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='Allowed slowdown compared to the baseline (default: 20%%).',
+    )
+
+    return parser.parse_args()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Accepts uploads like the GraphDB /statements endpoint would."""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        server = cast(StandInServer, self.server)
+        server.received_bytes += len(self.rfile.read(length))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    received_bytes: int = 0
+
+
+def start_stand_in() -> StandInServer:
+    server = StandInServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class PhaseTimer:
+    """Measures the wall time and peak traced memory of pipeline phases."""
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.results: dict[str, dict] = {}
+
+    def run(self, name: str, n_zaken: int, func, *args):
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+
+        peak_mb = None
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak_mb = (peak - before) / 1024 ** 2
+
+        self.results[name] = {
+            'seconds': seconds,
+            'zaken_per_second': n_zaken / seconds if seconds else None,
+            'peak_mb': peak_mb,
+        }
+        return result
+
+
+def build_synthetic(n_zaken: int):
+    """Returns a function that runs `get_all_zaken` on synthetic data."""
+
+    api = synthetic.SyntheticApi(n_zaken)
+
+    def get_all_zaken():
+        _, zaken = api.scrape()
+        return zaken
+
+    return get_all_zaken
+
+
+def build_replayed(directory: str, start_date, end_date):
+    """Returns a function that runs `get_all_zaken` on recorded data."""
+
+    def get_all_zaken():
+        replay(directory)
+        try:
+            tk_scraper = TkScraper(verbose=False)
+            tk_scraper.get_all_fracties(populate_members=True)
+
+            # Same requests as main(), otherwise they were not recorded
+            current_date = start_date
+            zaken = []
+            while current_date <= end_date:
+                next_date = current_date + datetime.timedelta(days=1)
+                for zaak_soort in ZaakSoort:
+                    zaken = tk_scraper.get_all_zaken(
+                        zaak_type=zaak_soort,
+                        start_date=current_date,
+                        end_date=next_date,
+                    )
+                current_date = next_date
+        finally:
+            restore()
+        return zaken
+
+    return get_all_zaken
+
+
+def run_pipeline(get_all_zaken, trace_memory: bool) -> dict[str, dict]:
+    server = start_stand_in()
+    url = f'http://127.0.0.1:{server.server_port}/statements'
+
+    timer = PhaseTimer(trace_memory)
+
+    zaken = timer.run('get_all_zaken', 0, get_all_zaken)
+    n_zaken = len(zaken)
+    timer.results['get_all_zaken']['zaken_per_second'] = (
+        n_zaken / timer.results['get_all_zaken']['seconds']
+    )
+
+    def to_rdf():
+        g = Graph()
+        g.bind('tk', 'http://www.semanticweb.org/twanh/ontologies/2025/9/tk/')
+        # Like main(), which shares the visited set per scraped day
+        visited: set = set()
+        for zaak in zaken:
+            zaak.to_rdf(g, visited)
+        return g
+
+    g = timer.run('to_rdf', n_zaken, to_rdf)
+    data = timer.run(
+        'serialize', n_zaken, lambda: g.serialize(format='turtle'),
+    )
+
+    def upload():
+        response = requests.post(
+            url,
+            data=data,
+            headers={'Content-Type': 'application/x-turtle'},
+        )
+        response.raise_for_status()
+
+    timer.run('upload', n_zaken, upload)
+    timer.run(
+        'diff_upload', n_zaken,
+        _upload_diff, g, url, SyncSnapshot(),
+    )
+
+    server.shutdown()
+    for result in timer.results.values():
+        result['zaken'] = n_zaken
+    timer.results['graph'] = {'zaken': n_zaken, 'triples': len(g)}
+    return timer.results
+
+
+def print_results(name: str, results: dict[str, dict]) -> None:
+    graph = results['graph']
+    print(f'\n{name}: {graph["zaken"]} zaken, {graph["triples"]} triples')
+    print(f'{"phase":<15} {"seconds":>10} {"zaken/s":>12} {"peak MB":>10}')
+    for phase, result in results.items():
+        if phase == 'graph':
+            continue
+        peak = result['peak_mb']
+        print(
+            f'{phase:<15} {result["seconds"]:>10.3f} '
+            f'{result["zaken_per_second"] or 0:>12.0f} '
+            f'{"-" if peak is None else f"{peak:.1f}":>10}',
+        )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Returns a description of every phase that regressed."""
+
+    regressions = []
+    for name, phases in results.items():
+        for phase, result in phases.items():
+            base = baseline.get(name, {}).get(phase)
+            if phase == 'graph' or base is None:
+                continue
+            for metric in ('seconds', 'peak_mb'):
+                if result[metric] is None or base[metric] is None:
+                    continue
+                if result[metric] > base[metric] * (1 + tolerance):
+                    regressions.append(
+                        f'{name} {phase} {metric}: '
+                        f'{base[metric]:.3f} -> {result[metric]:.3f}',
+                    )
+    return regressions
+
+
+def main() -> int:
+
+    logging.basicConfig(level=logging.WARNING)
+
+    args = create_arg_parser()
+
+    trace_memory = not args.no_memory
+    if trace_memory:
+        tracemalloc.start()
+
+    all_results = {}
+    if args.replay_api:
+        start_date = datetime.datetime.strptime(args.start_date, '%Y-%m-%d')
+        end_date = datetime.datetime.strptime(args.end_date, '%Y-%m-%d')
+        name = f'replay {args.start_date}..{args.end_date}'
+        all_results[name] = run_pipeline(
+            build_replayed(args.replay_api, start_date, end_date),
+            trace_memory,
+        )
+        print_results(name, all_results[name])
+    else:
+        for n_zaken in args.scales:
+            name = f'synthetic {n_zaken}'
+            all_results[name] = run_pipeline(
+                build_synthetic(n_zaken), trace_memory,
+            )
+            print_results(name, all_results[name])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(all_results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(all_results, baseline, args.tolerance)
+        if regressions:
+            print('\nRegressions compared to the baseline:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print('\nNo regressions compared to the baseline.')
+
+    return 0
+
+
+if __name__ == '__main__':
+
+    raise SystemExit(main())
@@ -0,0 +1,362 @@
+import datetime
+import hashlib
+import os
+import random
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scraper', 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+# The classifier creates an OpenAI client on import, the benchmarks never
+# classify anything so any key will do.
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+import classifier  # noqa: E402
+import scraper  # noqa: E402
+from models import OnderwerpType  # noqa: E402
+from models import ZaakSoort  # noqa: E402
+from rdflib import Graph  # noqa: E402
+from tkapi import TKApi  # noqa: E402
+
+ONTOLOGY = os.path.join(ROOT, 'kb', 'tweedekamer-ontology.ttl')
+
+# (naam, afkorting, zetels, positie); the position on a left/right axis is
+# used to make parties that are close to each other vote alike
+FRACTIES = [
+    ('Partij voor de Vrijheid', 'PVV', 37, 0.8),
+    ('GroenLinks-PvdA', 'GL-PvdA', 25, -0.7),
+    ('Volkspartij voor Vrijheid en Democratie', 'VVD', 24, 0.5),
+    ('Nieuw Sociaal Contract', 'NSC', 20, 0.2),
+    ('Democraten 66', 'D66', 9, -0.3),
+    ('BoerBurgerBeweging', 'BBB', 7, 0.6),
+    ('Christen-Democratisch Appèl', 'CDA', 5, 0.3),
+    ('Socialistische Partij', 'SP', 5, -0.8),
+    ('DENK', 'DENK', 3, -0.5),
+    ('Partij voor de Dieren', 'PvdD', 3, -0.9),
+    ('Forum voor Democratie', 'FvD', 3, 1.0),
+    ('Staatkundig Gereformeerde Partij', 'SGP', 3, 0.7),
+    ('ChristenUnie', 'CU', 3, 0.0),
+    ('Volt', 'Volt', 2, -0.4),
+    ('JA21', 'JA21', 1, 0.9),
+]
+
+VOORNAMEN = [
+    'Anna', 'Bram', 'Carla', 'Daan', 'Eva', 'Frank', 'Grietje', 'Hans',
+    'Ilse', 'Jan', 'Karin', 'Lars', 'Mirjam', 'Niels', 'Olga', 'Pieter',
+]
+ACHTERNAMEN = [
+    'de Vries', 'Jansen', 'Bakker', 'Visser', 'Smit', 'Meijer', 'de Boer',
+    'Mulder', 'de Groot', 'Bos', 'Vos', 'Peters', 'Hendriks', 'van Dijk',
+]
+
+# Words to build zaak descriptions from, roughly one vocabulary per topic
+WOORDEN = {
+    OnderwerpType.BinnenlandseZakenKoninkrijksrelaties: [
+        'gemeenten', 'provincies', 'Caribisch', 'verkiezingen', 'bestuur',
+    ],
+    OnderwerpType.BuitenlandseZakenEnDefensie: [
+        'Oekraïne', 'NAVO', 'defensie', 'ontwikkelingshulp', 'sancties',
+    ],
+    OnderwerpType.EconomieEnFinancien: [
+        'belastingen', 'begroting', 'inflatie', 'ondernemers', 'banken',
+    ],
+    OnderwerpType.InfrastructuurEnWaterstaat: [
+        'spoor', 'wegen', 'dijken', 'openbaar', 'vervoer', 'Schiphol',
+    ],
+    OnderwerpType.JustitieEnVeiligheid: [
+        'politie', 'rechtspraak', 'criminaliteit', 'asiel', 'gevangenis',
+    ],
+    OnderwerpType.KlimaatEnEnergie: [
+        'klimaat', 'energie', 'windparken', 'gaswinning', 'Groningen',
+    ],
+    OnderwerpType.LandbouwEnNatuur: [
+        'stikstof', 'boeren', 'natuur', 'visserij', 'dierenwelzijn',
+    ],
+    OnderwerpType.OnderwijsCultuurEnWetenschap: [
+        'leraren', 'scholen', 'studiefinanciering', 'cultuur', 'onderzoek',
+    ],
+    OnderwerpType.SocialeZakenEnWerkgelegenheid: [
+        'pensioenen', 'minimumloon', 'uitkeringen', 'arbeidsmarkt', 'AOW',
+    ],
+    OnderwerpType.VolksgezondheidEnZorg: [
+        'zorgverzekering', 'ziekenhuizen', 'jeugdzorg', 'GGZ', 'eigen',
+        'risico',
+    ],
+}
+TOPICS = list(WOORDEN)
+
+BESLUIT_SOORTEN = [
+    'Stemmen - aangenomen',
+    'Stemmen - verworpen',
+    'Stemmen - aangenomen',
+    'Stemmen - verworpen',
+    'Aangehouden',
+]
+
+# The soort as the API returns it, per ZaakSoort the scraper filters on
+ZAAK_SOORTEN = {
+    'Motie': 'Motie',
+    'Amendement': 'Amendement',
+    'Wetsvoorstel': 'Wetgeving',
+    'Initiatief Wetgeving': 'Initiatiefwetgeving',
+}
+
+_FRACTIE_ID_FILTER = re.compile(r'FractieZetel/Fractie/Id eq (\S+)')
+_SOORT_FILTER = re.compile(r"Soort eq '([^']+)'")
+
+
+def _odata_date(date: datetime.date) -> str:
+    return f'{date.isoformat()}T00:00:00Z'
+
+
+def _uuid(*parts) -> str:
+    digest = hashlib.md5('/'.join(map(str, parts)).encode()).hexdigest()
+    return (
+        f'{digest[:8]}-{digest[8:12]}-{digest[12:16]}-'
+        f'{digest[16:20]}-{digest[20:32]}'
+    )
+
+
+def classify_text(text, *args, **kwargs):
+    """A deterministic stand-in for `classifier.classify_text`."""
+
+    for topic in TOPICS:
+        if any(woord in text for woord in WOORDEN[topic]):
+            return topic
+    return None
+
+
+class SyntheticApi:
+    """
+    Serves generated TK OData API responses to tkapi, in process.
+
+    Zaken are spread evenly over `months` months starting at `start_date`
+    and every zaak has one besluit with a stemming per fractie. A fraction
+    of the zaken (`hoofdelijk_ratio`) is voted on per persoon instead, in
+    which case members occasionally deviate from their party.
+    """
+
+    def __init__(
+        self,
+        n_zaken: int,
+        start_date: datetime.date = datetime.date(2025, 1, 1),
+        months: int = 12,
+        hoofdelijk_ratio: float = 0.05,
+        seed: int = 0,
+    ):
+        self.n_zaken = n_zaken
+        self.start_date = start_date
+        self.days = months * 30
+        self.hoofdelijk_ratio = hoofdelijk_ratio
+        self.random = random.Random(seed)
+        self._original_request_json = None
+        self._original_classify_text = None
+
+        self.fracties: list[dict] = []
+        self.leden: dict[str, list[dict]] = {}
+        for naam, afkorting, zetels, positie in FRACTIES:
+            fractie: dict = {
+                'Id': _uuid('fractie', afkorting),
+                'NaamNL': naam,
+                'Afkorting': afkorting,
+                'AantalZetels': zetels,
+                'DatumActief': '2023-12-06T00:00:00Z',
+                'DatumInactief': None,
+                'Verwijderd': False,
+                '_positie': positie,
+            }
+            self.fracties.append(fractie)
+            self.leden[fractie['Id']] = [
+                self._lid(afkorting, i) for i in range(zetels)
+            ]
+
+        self.zaken = [self._zaak(i) for i in range(n_zaken)]
+
+    def _lid(self, afkorting: str, i: int) -> dict:
+        persoon = {
+            'Id': _uuid('persoon', afkorting, i),
+            'Voornamen': self.random.choice(VOORNAMEN),
+            'Achternaam': f'{self.random.choice(ACHTERNAMEN)} {afkorting}{i}',
+            'Geboortedatum': _odata_date(
+                datetime.date(1950, 1, 1)
+                + datetime.timedelta(days=self.random.randrange(18000)),
+            ),
+            'Geboorteplaats': 'Utrecht',
+            'Geslacht': self.random.choice(['man', 'vrouw']),
+            'Verwijderd': False,
+        }
+        return {
+            'Id': _uuid('lid', afkorting, i),
+            'Van': '2023-12-06T00:00:00Z',
+            'TotEnMet': None,
+            'Verwijderd': False,
+            'Persoon@odata.navigationLink': f'Persoon({persoon["Id"]})',
+            'Persoon': persoon,
+        }
+
+    def _keuze(self, positie: float, lean: float) -> str:
+        if self.random.random() < 0.03:
+            return 'Niet deelgenomen'
+        agreement = 0.5 + 0.45 * positie * lean
+        return 'Voor' if self.random.random() < agreement else 'Tegen'
+
+    def _stemming(self, zaak_id: str, i: int, keuze: str, **actor) -> dict:
+        return {
+            'Id': _uuid('stemming', zaak_id, i),
+            'Soort': keuze,
+            'Vergissing': False,
+            'Verwijderd': False,
+            'Persoon_Id': None,
+            'Fractie_Id': None,
+            **actor,
+        }
+
+    def _zaak(self, i: int) -> dict:
+        zaak_id = _uuid('zaak', i)
+        topic = self.random.choice(TOPICS)
+        datum = self.start_date + datetime.timedelta(
+            days=i * self.days // max(self.n_zaken, 1),
+        )
+        beschrijving = 'Motie over ' + ' '.join(
+            self.random.sample(WOORDEN[topic], 2),
+        )
+
+        lean = self.random.uniform(-1, 1)
+        hoofdelijk = self.random.random() < self.hoofdelijk_ratio
+
+        stemmingen: list[dict] = []
+        for fractie in self.fracties:
+            keuze = self._keuze(fractie['_positie'], lean)
+            if not hoofdelijk:
+                stemmingen.append(self._stemming(
+                    zaak_id, len(stemmingen), keuze,
+                    Fractie_Id=fractie['Id'],
+                    FractieGrootte=fractie['AantalZetels'],
+                    **{
+                        'Fractie@odata.navigationLink': 'Fractie',
+                        'Fractie': fractie,
+                    },
+                ))
+                continue
+
+            for lid in self.leden[fractie['Id']]:
+                # Members mostly follow the party line
+                lid_keuze = keuze
+                if self.random.random() < 0.05:
+                    lid_keuze = self._keuze(-fractie['_positie'], lean)
+                stemmingen.append(self._stemming(
+                    zaak_id, len(stemmingen), lid_keuze,
+                    Persoon_Id=lid['Persoon']['Id'],
+                    **{
+                        'Persoon@odata.navigationLink': 'Persoon',
+                        'Persoon': lid['Persoon'],
+                    },
+                ))
+
+        besluit = {
+            'Id': _uuid('besluit', zaak_id),
+            'BesluitSoort': self.random.choice(BESLUIT_SOORTEN),
+            'StemmingsSoort': (
+                'Hoofdelijk' if hoofdelijk else 'Met handopsteken'
+            ),
+            'Verwijderd': False,
+            'Stemming@odata.navigationLink': 'Stemming',
+            'Stemming': stemmingen,
+        }
+
+        return {
+            'Id': zaak_id,
+            'Nummer': f'{datum.year}Z{i:05d}',
+            'Volgnummer': str(i),
+            'Soort': list(ZAAK_SOORTEN.values())[i % len(ZAAK_SOORTEN)],
+            'Onderwerp': beschrijving,
+            'Afgedaan': True,
+            'GestartOp': _odata_date(datum),
+            'Verwijderd': False,
+            'Besluit@odata.navigationLink': 'Besluit',
+            'Besluit': [besluit],
+        }
+
+    def request_json(self, url, params=None, max_items=None) -> dict:
+        """
+        Answer a tkapi request. Only the fractie and zaak soort filters
+        are applied, all zaken are returned regardless of their date.
+        """
+
+        filter_str = (params or {}).get('$filter', '')
+
+        if url.startswith('FractieZetelPersoon'):
+            match = _FRACTIE_ID_FILTER.search(filter_str)
+            return {'value': self.leden[match.group(1)] if match else []}
+        if url.startswith('Fractie'):
+            return {'value': self.fracties}
+        if url.startswith('Zaak'):
+            match = _SOORT_FILTER.search(filter_str)
+            if match is None:
+                return {'value': self.zaken}
+            soort = ZAAK_SOORTEN.get(match.group(1), match.group(1))
+            return {
+                'value': [
+                    zaak for zaak in self.zaken if zaak['Soort'] == soort
+                ],
+            }
+        return {'value': []}
+
+    def install(self) -> None:
+        """Answer all tkapi requests and classifications with this data."""
+
+        self._original_request_json = TKApi.__dict__['_request_json']
+        self._original_classify_text = classifier.classify_text
+
+        api = self
+
+        def request_json(cls, url, params=None, max_items=None):
+            return api.request_json(url, params, max_items)
+
+        TKApi._request_json = classmethod(request_json)
+        classifier.classify_text = classify_text
+
+    def restore(self) -> None:
+        TKApi._request_json = self._original_request_json
+        classifier.classify_text = self._original_classify_text
+
+    def scrape(self, classify_topics: bool = True):
+        """Run the scraper against this data, returns (fracties, zaken)."""
+
+        self.install()
+        try:
+            tk_scraper = scraper.TkScraper(verbose=False)
+            fracties = tk_scraper.get_all_fracties(populate_members=True)
+            # The scraper keeps all zaken it has seen, so the last call
+            # returns the zaken of every soort
+            for zaak_soort in ZaakSoort:
+                zaken = tk_scraper.get_all_zaken(
+                    zaak_type=zaak_soort,
+                    classify_topics=classify_topics,
+                )
+        finally:
+            self.restore()
+        return fracties, zaken
+
+
+def build_graph(n_zaken: int, seed: int = 0) -> Graph:
+    """
+    The ontology plus `n_zaken` synthetic zaken (with their fracties,
+    personen and votes) as the scraper would upload them to GraphDB.
+    """
+
+    fracties, zaken = SyntheticApi(n_zaken, seed=seed).scrape()
+
+    g = Graph()
+    g.bind('tk', 'http://www.semanticweb.org/twanh/ontologies/2025/9/tk/')
+    g.parse(ONTOLOGY, format='turtle')
+
+    visited: set = set()
+    for fractie in fracties:
+        fractie.to_rdf(g, visited)
+    for zaak in zaken:
+        zaak.to_rdf(g, visited)
+
+    return g
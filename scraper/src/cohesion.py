@@ -0,0 +1,132 @@
+import numpy as np
+
+# The keuzes in the vote matrices, 0 is "did not vote"
+VOOR = 1
+TEGEN = 2
+NIET_DEELGENOMEN = 3
+
+KEUZE_CODES = {
+    'voor': VOOR,
+    'tegen': TEGEN,
+    'niet_deelgenomen': NIET_DEELGENOMEN,
+}
+
+
+def _vote_matrix(
+    votes: list[tuple[str, str, str]],
+    actoren: dict[str, int],
+    zaken: dict[str, int],
+) -> np.ndarray:
+    """An actor x zaak matrix with the keuze codes of `votes`."""
+
+    matrix = np.zeros((len(actoren), len(zaken)), dtype=np.int8)
+    rows = [(actoren[a], zaken[z], KEUZE_CODES[k]) for a, k, z in votes]
+    if rows:
+        actor_idx, zaak_idx, codes = np.array(rows, dtype=np.int64).T
+        matrix[actor_idx, zaak_idx] = codes
+    return matrix
+
+
+def compute_cohesie(
+    fractie_votes: list[tuple[str, str, str]],
+    persoon_votes: list[tuple[str, str, str]],
+    leden: dict[str, str],
+) -> tuple[dict[str, dict], dict[str, dict]]:
+    """
+    How often personen vote against the line of their fractie, and how
+    cohesive the fracties vote.
+
+    The votes are (actor, keuze, zaak) tuples and `leden` maps a persoon
+    to its fractie. The line of a fractie on a zaak is its own vote if it
+    has one, otherwise the majority of the voor and tegen votes of its
+    leden (none on a tie). The cohesion of a fractie is the mean of
+    |voor - tegen| / (voor + tegen) of its leden over the zaken they voted
+    on (the Rice index), 1 when they always vote the same.
+
+    Returns the stats per persoon and per fractie.
+    """
+
+    fracties = {
+        fractie: i for i, fractie in enumerate(
+            sorted({a for a, _, _ in fractie_votes} | set(leden.values())),
+        )
+    }
+    personen = {
+        persoon: i for i, persoon in enumerate(
+            sorted({a for a, _, _ in persoon_votes}),
+        )
+    }
+    zaken = {
+        zaak: i for i, zaak in enumerate(
+            sorted({z for _, _, z in fractie_votes + persoon_votes}),
+        )
+    }
+
+    fractie_matrix = _vote_matrix(fractie_votes, fracties, zaken)
+    persoon_matrix = _vote_matrix(persoon_votes, personen, zaken)
+
+    # The fractie of every persoon, -1 if it has none
+    persoon_fractie = np.array(
+        [fracties[leden[p]] if p in leden else -1 for p in personen],
+        dtype=np.int64,
+    )
+    has_fractie = persoon_fractie >= 0
+
+    # Fractie x persoon membership, to count the votes of the leden
+    membership = np.zeros((len(fracties), len(personen)), dtype=np.int32)
+    membership[persoon_fractie[has_fractie], np.flatnonzero(has_fractie)] = 1
+
+    leden_voor = membership @ (persoon_matrix == VOOR).astype(np.int32)
+    leden_tegen = membership @ (persoon_matrix == TEGEN).astype(np.int32)
+
+    line = np.where(
+        leden_voor > leden_tegen, VOOR,
+        np.where(leden_tegen > leden_voor, TEGEN, 0),
+    ).astype(np.int8)
+    own_line = (fractie_matrix == VOOR) | (fractie_matrix == TEGEN)
+    line = np.where(own_line, fractie_matrix, line)
+
+    # Every persoon against the line of its own fractie
+    persoon_line = np.zeros_like(persoon_matrix)
+    persoon_line[has_fractie] = line[persoon_fractie[has_fractie]]
+    counted = (
+        ((persoon_matrix == VOOR) | (persoon_matrix == TEGEN))
+        & (persoon_line != 0)
+    )
+    afwijkend = counted & (persoon_matrix != persoon_line)
+
+    persoon_stemmen = counted.sum(axis=1)
+    persoon_afwijkend = afwijkend.sum(axis=1)
+
+    # The Rice index of every fractie on every zaak its leden voted on
+    leden_stemmen = leden_voor + leden_tegen
+    voted = leden_stemmen > 0
+    rice = np.divide(
+        np.abs(leden_voor - leden_tegen), leden_stemmen,
+        out=np.zeros(leden_stemmen.shape), where=voted,
+    )
+    fractie_stemmingen = voted.sum(axis=1)
+    fractie_cohesie = np.divide(
+        rice.sum(axis=1), fractie_stemmingen,
+        out=np.ones(len(fracties)), where=fractie_stemmingen > 0,
+    )
+    fractie_afwijkend = membership @ persoon_afwijkend.astype(np.int32)
+
+    persoon_stats = {
+        persoon: {
+            'stemmen': int(persoon_stemmen[i]),
+            'afwijkend': int(persoon_afwijkend[i]),
+        }
+        for persoon, i in personen.items()
+        if persoon_stemmen[i]
+    }
+    fractie_stats = {
+        fractie: {
+            'stemmingen': int(fractie_stemmingen[i]),
+            'cohesie': round(float(fractie_cohesie[i]), 4),
+            'afwijkende_stemmen': int(fractie_afwijkend[i]),
+        }
+        for fractie, i in fracties.items()
+        if fractie_stemmingen[i]
+    }
+    return persoon_stats, fractie_stats
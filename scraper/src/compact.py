@@ -0,0 +1,189 @@
+import argparse
+import logging
+import os
+
+import requests
+from models import onderwerp_uuid
+from models import OnderwerpType
+from models import TK
+from requests.exceptions import RequestException
+from sync import build_data_version_update
+
+# Note: <http://www.ontotext.com/explicit> is a GraphDB pseudo-graph that
+# only contains the explicit (non inferred) triples
+ONDERWERPEN_QUERY = """
+PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+SELECT DISTINCT ?onderwerp ?onderwerpType
+FROM <http://www.ontotext.com/explicit>
+WHERE {
+    ?onderwerp a tk:Onderwerp ;
+               tk:onderwerpType ?onderwerpType .
+}
+"""
+
+COUNT_TRIPLES_QUERY = """
+SELECT (COUNT(*) AS ?aantal)
+FROM <http://www.ontotext.com/explicit>
+WHERE { ?s ?p ?o . }
+"""
+
+# Move all triples of the duplicate nodes to the canonical node and
+# remove the duplicates
+MERGE_UPDATE = """
+DELETE {{
+    ?duplicaat ?p ?o .
+    ?s ?p2 ?duplicaat .
+}}
+INSERT {{
+    <{canonical}> ?p ?o .
+    ?s ?p2 <{canonical}> .
+}}
+USING <http://www.ontotext.com/explicit>
+WHERE {{
+    VALUES ?duplicaat {{ {duplicates} }}
+    {{ ?duplicaat ?p ?o . }}
+    UNION
+    {{ ?s ?p2 ?duplicaat . }}
+}}
+"""
+
+
+def create_arg_parser():
+    """
+    Create the argument parser for the script.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=(
+            'Merge duplicate Onderwerp nodes in GraphDB into a single '
+            'node per onderwerp type.'
+        ),
+    )
+    parser.add_argument(
+        '--graphdb-url',
+        type=str,
+        default=os.environ.get(
+            'GRAPHDB_URL',
+            'http://localhost:7200/repositories/tk_kb/statements',
+        ),
+        help='The URL of the GraphDB instance.',
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Only report the duplicates, do not merge them.',
+    )
+
+    return parser.parse_args()
+
+
+def _query(url: str, query: str) -> list[dict]:
+    response = requests.post(
+        url,
+        data={'query': query},
+        headers={'Accept': 'application/sparql-results+json'},
+    )
+    response.raise_for_status()
+    return response.json()['results']['bindings']
+
+
+def _count_triples(url: str) -> int:
+    return int(_query(url, COUNT_TRIPLES_QUERY)[0]['aantal']['value'])
+
+
+def compact_onderwerpen(graphdb_url: str, dry_run: bool = False) -> int:
+    """
+    Merge all Onderwerp nodes of the same type into the node with the
+    stable URI for that type (see `models.onderwerp_uuid`).
+    """
+
+    # Queries go to the repository, updates to its /statements endpoint
+    statements_url = graphdb_url.rstrip('/')
+    if not statements_url.endswith('/statements'):
+        statements_url += '/statements'
+    query_url = statements_url.removesuffix('/statements')
+
+    try:
+        bindings = _query(query_url, ONDERWERPEN_QUERY)
+    except RequestException as e:
+        logging.error(f'Error fetching onderwerpen from GraphDB: {e}')
+        return 1
+
+    nodes_per_type: dict[OnderwerpType, set[str]] = {}
+    for binding in bindings:
+        try:
+            onderwerp_type = OnderwerpType(binding['onderwerpType']['value'])
+        except ValueError:
+            logging.warning(
+                'Skipping onderwerp with unknown type: '
+                f'{binding["onderwerpType"]["value"]}',
+            )
+            continue
+        nodes_per_type.setdefault(onderwerp_type, set()).add(
+            binding['onderwerp']['value'],
+        )
+
+    merges = {}
+    for onderwerp_type, nodes in nodes_per_type.items():
+        canonical = str(TK[f'onderwerp/{onderwerp_uuid(onderwerp_type)}'])
+        duplicates = nodes - {canonical}
+        if duplicates:
+            merges[canonical] = duplicates
+            logging.info(
+                f'Found {len(duplicates)} duplicate nodes '
+                f'for {onderwerp_type}',
+            )
+
+    n_duplicates = sum(len(duplicates) for duplicates in merges.values())
+    if not merges:
+        logging.info('No duplicate onderwerp nodes found.')
+        return 0
+    if dry_run:
+        logging.info(f'Would remove {n_duplicates} duplicate onderwerp nodes.')
+        return 0
+
+    try:
+        triples_before = _count_triples(query_url)
+        for canonical, duplicates in merges.items():
+            update = MERGE_UPDATE.format(
+                canonical=canonical,
+                duplicates=' '.join(f'<{uri}>' for uri in sorted(duplicates)),
+            )
+            response = requests.post(
+                statements_url,
+                data=update.encode('utf-8'),
+                headers={'Content-Type': 'application/sparql-update'},
+            )
+            response.raise_for_status()
+        triples_after = _count_triples(query_url)
+
+        # Let the app know that the data changed
+        response = requests.post(
+            statements_url,
+            data=build_data_version_update().encode('utf-8'),
+            headers={'Content-Type': 'application/sparql-update'},
+        )
+        response.raise_for_status()
+    except RequestException as e:
+        logging.error(f'Error merging onderwerpen in GraphDB: {e}')
+        return 1
+
+    logging.info(
+        f'Removed {n_duplicates} duplicate onderwerp nodes and '
+        f'{triples_before - triples_after} triples.',
+    )
+    return 0
+
+
+def main() -> int:
+
+    logging.basicConfig(level=logging.INFO)
+
+    args = create_arg_parser()
+
+    return compact_onderwerpen(args.graphdb_url, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+
+    raise SystemExit(main())
@@ -3,12 +3,21 @@ import datetime
 import logging
 import os
 import time
+from typing import Optional
 
+import replay
 import requests
 from models import Zaak
 from models import ZaakSoort
+from profiles import update_profielen
 from rdflib import Graph
 from requests.exceptions import JSONDecodeError
+from rollups import update_rollups
+from sync import build_data_version_update
+from sync import build_update
+from sync import SyncSnapshot
+from sync import UPDATE_BATCH_SIZE
+from warmup import warm_up_app
 
 from scraper import TkScraper
 
@@ -55,11 +64,55 @@ def create_arg_parser():
         help='Disable topic classification for zaken.',
     )
 
+    parser.add_argument(
+        '--sync-snapshot',
+        type=str,
+        default=os.environ.get('SYNC_SNAPSHOT', 'sync_snapshot.json.gz'),
+        help='File with the triples that were last uploaded to GraphDB.',
+    )
+
+    parser.add_argument(
+        '--full-upload',
+        action='store_true',
+        help=(
+            'Upload all scraped triples instead of only the '
+            'changes since the last sync.'
+        ),
+    )
+
+    parser.add_argument(
+        '--app-url',
+        type=str,
+        default=os.environ.get('APP_URL', ''),
+        help=(
+            'The URL of the app, to warm up its caches after uploading '
+            '(see warmup.py).'
+        ),
+    )
+
+    api_group = parser.add_mutually_exclusive_group()
+    api_group.add_argument(
+        '--record-api',
+        type=str,
+        metavar='DIR',
+        help='Save all TK API responses to DIR while scraping.',
+    )
+    api_group.add_argument(
+        '--replay-api',
+        type=str,
+        metavar='DIR',
+        help='Answer all TK API requests from responses saved in DIR.',
+    )
+
     return parser.parse_args()
 
 
-def _upload_graph(g: Graph, url: str) -> None:
-    """Upload the RDF graph to the GraphDB instance."""
+def _upload_graph(g: Graph, url: str) -> bool:
+    """
+    Upload the RDF graph to the GraphDB instance.
+
+    Returns whether the data was uploaded.
+    """
 
     logging.info('Uploading data to GraphDB...')
     data = g.serialize(format='turtle')
@@ -69,8 +122,71 @@ def _upload_graph(g: Graph, url: str) -> None:
         response = requests.post(url, data=data, headers=headers)
         response.raise_for_status()
         logging.info('Data uploaded successfully to GraphDB.')
+        return True
     except requests.exceptions.RequestException as e:
         logging.error(f'Error uploading data to GraphDB: {e}')
+        return False
+
+
+def _upload_diff(g: Graph, url: str, snapshot: SyncSnapshot) -> bool:
+    """
+    Upload only the triples that changed since the last sync to GraphDB.
+
+    Entities whose triples did not change are skipped, for the others
+    the removed triples are deleted and the new triples are inserted.
+    Returns whether any changes were uploaded.
+    """
+
+    changes = snapshot.diff(g)
+    if not changes:
+        logging.info('No changes since the last sync, nothing to upload.')
+        return False
+
+    logging.info(f'Uploading changes for {len(changes)} entities...')
+    headers = {'Content-Type': 'application/sparql-update'}
+
+    uploaded = False
+    for i in range(0, len(changes), UPDATE_BATCH_SIZE):
+        batch = changes[i:i + UPDATE_BATCH_SIZE]
+        try:
+            response = requests.post(
+                url,
+                data=build_update(batch).encode('utf-8'),
+                headers=headers,
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logging.error(f'Error uploading changes to GraphDB: {e}')
+            break
+
+        # Only remember what actually made it into GraphDB
+        snapshot.apply(batch)
+        uploaded = True
+    else:
+        logging.info('Changes uploaded successfully to GraphDB.')
+
+    snapshot.save()
+    return uploaded
+
+
+def _update_data_version(url: str) -> Optional[datetime.datetime]:
+    """
+    Let the app know that the data in GraphDB changed. Returns the new
+    version, None if it could not be set.
+    """
+
+    version = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        response = requests.post(
+            url,
+            data=build_data_version_update(version).encode('utf-8'),
+            headers={'Content-Type': 'application/sparql-update'},
+        )
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logging.error(f'Error updating the data version in GraphDB: {e}')
+        return None
+    return version
 
 
 def _scrape_zaken(
@@ -125,11 +241,39 @@ def main() -> int:
     start_date = datetime.datetime.strptime(args.start_date, '%Y-%m-%d')
     end_date = datetime.datetime.strptime(args.end_date, '%Y-%m-%d')
 
+    if args.record_api:
+        replay.record(args.record_api)
+    elif args.replay_api:
+        replay.replay(args.replay_api)
+
     # Initialize the scraper and the graph
     scraper = TkScraper(verbose=False)
     g = Graph()
     g.bind('tk', 'http://www.semanticweb.org/twanh/ontologies/2025/9/tk/')
 
+    snapshot = SyncSnapshot.load(args.sync_snapshot)
+
+    # The last data version that was set
+    version = None
+
+    def upload(
+        g: Graph,
+        months: Optional[set[tuple[int, int]]] = None,
+    ) -> bool:
+        nonlocal version
+
+        if args.full_upload:
+            uploaded = _upload_graph(g, args.graphdb_url)
+        else:
+            uploaded = _upload_diff(g, args.graphdb_url, snapshot)
+
+        if uploaded:
+            # Recompute the counts of the months the zaken are in
+            update_rollups(args.graphdb_url, months or set())
+            version = _update_data_version(args.graphdb_url) or version
+
+        return uploaded
+
     # Run the scraper
 
     # First scrape all the fracties
@@ -153,11 +297,13 @@ def main() -> int:
         fractie.to_rdf(g)
 
     # Update the graphdb
-    _upload_graph(g, args.graphdb_url)
+    uploaded = upload(g)
 
     # Scrape zaken day by day based on the start and end date
     current_date = start_date
     n_zaken = 0
+    # The zaken scraped in the previous days, by uuid
+    scraped_zaken: dict[str, Zaak] = {}
     while current_date <= end_date:
 
         logging.info(f'Scraping zaken for date: {current_date.date()}')
@@ -170,6 +316,11 @@ def main() -> int:
             ZaakSoort.INITIATIEF_WETGEVING,
         ]
 
+        # Shared by all zaken of the day, otherwise every zaak converts all
+        # other zaken of its onderwerp again (through Onderwerp.zaken)
+        visited: set = set()
+        months: set[tuple[int, int]] = set()
+
         for zaak_type in zaak_types:
             logging.info(f'Scraping zaken of type: {zaak_type}')
 
@@ -184,14 +335,32 @@ def main() -> int:
             n_zaken += len(zaken)
 
             for zaak in zaken:
-                zaak.to_rdf(g)
+                zaak.to_rdf(g, visited)
+                # The scraper returns all zaken it scraped so far, only
+                # the months of those (re)scraped for this day changed
+                if scraped_zaken.get(zaak.uuid) is zaak:
+                    continue
+                scraped_zaken[zaak.uuid] = zaak
+                if zaak.indienings_datum:
+                    months.add((
+                        zaak.indienings_datum.year,
+                        zaak.indienings_datum.month,
+                    ))
 
         # Upload the graph after each day's scraping
-        _upload_graph(g, args.graphdb_url)
+        uploaded = upload(g, months) or uploaded
 
         # Move to the next date
         current_date = next_date
 
+    # The profielen are over all votes, so compute them once per run
+    if uploaded and update_profielen(args.graphdb_url):
+        version = _update_data_version(args.graphdb_url) or version
+
+    # Visit the pages of the app, so its first visitors don't have to wait
+    if uploaded and args.app_url:
+        warm_up_app(args.graphdb_url, args.app_url, version)
+
     logging.info('Scraping and uploading completed successfully.')
     logging.info(f'Total fracties scraped: {len(fracties)}')
     logging.info(f'Total zaken scraped: {n_zaken}')
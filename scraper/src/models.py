@@ -1,5 +1,8 @@
 import enum
+import json
+import sys
 import uuid
+from array import array
 from dataclasses import dataclass
 from dataclasses import field
 from datetime import datetime
@@ -45,8 +48,27 @@ class OnderwerpType(enum.Enum):
 
 TK = Namespace('http://www.semanticweb.org/twanh/ontologies/2025/9/tk/')
 
+# Namespace for UUIDs of instances that are not identified by an ID from
+# the TK API but by their content (e.g. an Onderwerp by its type)
+TK_UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, str(TK))
 
-@dataclass
+
+def onderwerp_uuid(onderwerp_type: OnderwerpType) -> str:
+    """The stable UUID of the Onderwerp instance for an OnderwerpType."""
+    return str(
+        uuid.uuid5(TK_UUID_NAMESPACE, f'onderwerp/{onderwerp_type.value}'),
+    )
+
+
+def intern_str(value: Optional[str]) -> Optional[str]:
+    """
+    Intern a string that repeats across many instances (e.g. a besluit
+    resultaat), so all instances share a single copy of it.
+    """
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(slots=True)
 class RdfModel:
     """
     A base dataclass which the other models will inherit
@@ -79,7 +101,7 @@ class RdfModel:
         raise NotImplementedError('Should be implemented by subclass')
 
 
-@dataclass
+@dataclass(slots=True)
 class Actor(RdfModel):
     """:Actor"""
 
@@ -110,7 +132,7 @@ class Actor(RdfModel):
             ))
 
 
-@dataclass
+@dataclass(slots=True)
 class Persoon(Actor):
     """:Persoon"""
 
@@ -135,8 +157,9 @@ class Persoon(Actor):
         visited.add(persoon_uri)
 
         g.add((persoon_uri, RDF.type, TK.Persoon))
-        # Add properties from Actor
-        super().to_rdf(g, visited)
+        # Add properties from Actor (zero-argument super() does not work
+        # in slotted dataclasses)
+        Actor.to_rdf(self, g, visited)
 
         if self.geboortedatum:
             g.add((
@@ -176,7 +199,7 @@ class Persoon(Actor):
             self.is_lid_van.to_rdf(g, visited)
 
 
-@dataclass
+@dataclass(slots=True)
 class Fractie(Actor):
     """:Fractie"""
 
@@ -206,7 +229,7 @@ class Fractie(Actor):
         g.add((fractie_uri, RDF.type, TK.Fractie))
 
         # Add properties from Actor
-        super().to_rdf(g, visited)
+        Actor.to_rdf(self, g, visited)
 
         if self.afkorting:
             g.add((
@@ -243,7 +266,7 @@ class Fractie(Actor):
             lid.to_rdf(g, visited)
 
 
-@dataclass
+@dataclass(slots=True)
 class Zaak(RdfModel):
     """:Zaak, also maps its subclasses"""
 
@@ -268,6 +291,16 @@ class Zaak(RdfModel):
     onderwerp: Optional['Onderwerp'] = None
     stemmingen: list['Stemming'] = field(default_factory=list)
 
+    def stemmings_overzicht(self) -> dict[str, str]:
+        """The keuze of every fractie that voted on the zaak, by naam."""
+
+        overzicht = {}
+        for stemming in self.stemmingen:
+            for actor, keuze in stemming.resultaten:
+                if isinstance(actor, Fractie) and actor.naam:
+                    overzicht[actor.naam] = keuze.value
+        return overzicht
+
     def to_rdf(self, g: Graph, visited: Optional[set] = None):
         if visited is None:
             visited = set()
@@ -364,6 +397,19 @@ class Zaak(RdfModel):
                 ),
             ))
 
+        # The votes of the fracties in a single literal, so the app does
+        # not have to check every fractie for a vote on this zaak
+        g.add((
+            zaak_uri, TK.stemmingsOverzicht, Literal(
+                json.dumps(
+                    self.stemmings_overzicht(),
+                    ensure_ascii=False,
+                    sort_keys=True,
+                ),
+                datatype=XSD.string,
+            ),
+        ))
+
         if self.onderwerp:
             onderwerp_uri = self.onderwerp.get_uri()
             g.add((zaak_uri, TK.heeftOnderwerp, onderwerp_uri))
@@ -381,7 +427,80 @@ class Zaak(RdfModel):
             stemming.to_rdf(g, visited)
 
 
-@dataclass
+class ActorTable:
+    """
+    Numbers the actors that voted, so votes can refer to an actor by its
+    index. A single table is shared by all stemmingen of a scrape.
+    """
+
+    __slots__ = ('actoren', '_indices')
+
+    def __init__(self):
+        self.actoren: list[Actor] = []
+        self._indices: dict[tuple[type, str], int] = {}
+
+    def index(self, actor: Actor) -> int:
+        key = (type(actor), actor.uuid)
+        index = self._indices.get(key)
+        if index is None:
+            index = self._indices[key] = len(self.actoren)
+            self.actoren.append(actor)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.actoren)
+
+
+class StemmingResultaten:
+    """
+    The individual votes of a Stemming, as (Actor, StemmingKeuze) pairs.
+
+    Instead of a tuple per vote, the votes are kept in two arrays with the
+    index of the actor in an ActorTable and the index of the keuze, which
+    takes 5 bytes per vote.
+    """
+
+    __slots__ = ('actor_table', '_actoren', '_keuzes')
+
+    KEUZES = tuple(StemmingKeuze)
+    _KEUZE_INDICES = {keuze: i for i, keuze in enumerate(KEUZES)}
+
+    def __init__(
+        self,
+        actor_table: Optional[ActorTable] = None,
+        resultaten=(),
+    ):
+        if actor_table is None:
+            actor_table = ActorTable()
+        self.actor_table = actor_table
+        self._actoren = array('I')
+        self._keuzes = array('B')
+        for resultaat in resultaten:
+            self.append(resultaat)
+
+    def append(self, resultaat: tuple[Actor, StemmingKeuze]) -> None:
+        actor, keuze = resultaat
+        self._actoren.append(self.actor_table.index(actor))
+        self._keuzes.append(self._KEUZE_INDICES[keuze])
+
+    def __iter__(self):
+        actoren = self.actor_table.actoren
+        for actor_index, keuze_index in zip(self._actoren, self._keuzes):
+            yield actoren[actor_index], self.KEUZES[keuze_index]
+
+    def __len__(self) -> int:
+        return len(self._actoren)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StemmingResultaten):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f'StemmingResultaten({list(self)!r})'
+
+
+@dataclass(slots=True)
 class Stemming(RdfModel):
 
     soort: Optional[str] = None  # Maps to :stemmingSoort, e.g.: Hoofdelijk
@@ -391,9 +510,9 @@ class Stemming(RdfModel):
     is_stemming_over: Optional['Zaak'] = None
 
     # This field will hold the raw scraped voting data.
-    resultaten: list[
-        tuple['Actor', 'StemmingKeuze']
-    ] = field(default_factory=list)
+    resultaten: StemmingResultaten = field(
+        default_factory=StemmingResultaten,
+    )
 
     def to_rdf(self, g: Graph, visited: Optional[set] = None):
         """Adds RDF triples for this stemming instance to the graph."""
@@ -463,13 +582,20 @@ class Stemming(RdfModel):
             actor.to_rdf(g, visited)
 
 
-@dataclass
+@dataclass(slots=True)
 class Onderwerp(RdfModel):
     """:Onderwerp"""
 
     onderwerp_type: Optional[OnderwerpType] = None
     zaken: list['Zaak'] = field(default_factory=list)
 
+    def __post_init__(self):
+        # There is a single Onderwerp per OnderwerpType, so its URI is
+        # derived from the type. This way every scraper run links its zaken
+        # to the same node instead of minting a new one.
+        if self.onderwerp_type is not None:
+            self.uuid = onderwerp_uuid(self.onderwerp_type)
+
     def to_rdf(self, g: Graph, visited: Optional[set] = None):
         if visited is None:
             visited = set()
@@ -0,0 +1,265 @@
+import argparse
+import json
+import logging
+import os
+
+import requests
+from cohesion import compute_cohesie
+from models import TK
+from rdflib import Literal
+from rdflib import URIRef
+from rdflib import XSD
+from requests.exceptions import RequestException
+from rollups import repository_urls
+from rollups import sparql_query
+from sync import build_data_version_update
+
+# The fractie and persoon pages show the votes of the actor per onderwerp
+# and the zaken it voted on last. Instead of aggregating those on every
+# page view, the scraper computes them for all actoren in one pass over
+# all votes and stores them as a tk:profiel on the actor. The profielen
+# also hold how often a persoon votes against its fractie and how
+# cohesive a fractie votes (see cohesion.py).
+
+# The number of zaken in the "recent zaken" of a profiel
+RECENT_ZAKEN = 10
+
+ZAKEN_QUERY = """
+SELECT ?zaak ?nummer ?beschrijving ?datum ?onderwerpType WHERE {
+    ?zaak a tk:Zaak ;
+          tk:nummer ?nummer ;
+          tk:beschrijving ?beschrijving .
+    OPTIONAL { ?zaak tk:indieningsDatum ?datum . }
+    OPTIONAL {
+        ?zaak tk:heeftOnderwerp ?onderwerp .
+        ?onderwerp tk:onderwerpType ?onderwerpType .
+    }
+}
+"""
+
+VOTES_QUERY = """
+SELECT ?actor ?soort ?keuze ?zaak WHERE {
+    VALUES (?voteProperty ?keuze) {
+        (tk:heeftVoorGestemd "voor")
+        (tk:heeftTegenGestemd "tegen")
+        (tk:heeftNietDeelgenomen "niet_deelgenomen")
+    }
+    ?actor ?voteProperty ?zaak .
+    {
+        ?actor a tk:Fractie .
+        BIND ("fractie" AS ?soort)
+    }
+    UNION
+    {
+        ?actor a tk:Persoon .
+        BIND ("persoon" AS ?soort)
+    }
+}
+"""
+
+LEDEN_QUERY = """
+SELECT ?persoon ?fractie WHERE {
+    ?persoon a tk:Persoon ;
+             tk:isLidVan ?fractie .
+}
+ORDER BY ?persoon ?fractie
+"""
+
+# The label of a vote on the pages, the first keuze the actor has wins
+VOTE_LABELS = {
+    'voor': 'Voor',
+    'tegen': 'Tegen',
+    'niet_deelgenomen': 'Niet Deelgenomen',
+}
+
+
+def create_arg_parser():
+    """
+    Create the argument parser for the script.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=(
+            'Recompute the profielen of all fracties and personen that the '
+            'fractie and persoon pages of the app show.'
+        ),
+    )
+    parser.add_argument(
+        '--graphdb-url',
+        type=str,
+        default=os.environ.get(
+            'GRAPHDB_URL',
+            'http://localhost:7200/repositories/tk_kb/statements',
+        ),
+        help='The URL of the GraphDB instance.',
+    )
+
+    return parser.parse_args()
+
+
+def _recent_key(zaak: dict) -> tuple:
+    # Sorted in reverse: newest first, zaken without a datum last
+    return (zaak['datum'] is not None, zaak['datum'] or '')
+
+
+def compute_profielen(
+    zaken: list[dict],
+    votes: list[dict],
+    leden: list[dict],
+) -> dict:
+    """
+    Compute the profiel of every actor from the bindings of ZAKEN_QUERY,
+    VOTES_QUERY and LEDEN_QUERY: its votes per onderwerp and keuze, the
+    last RECENT_ZAKEN zaken it voted on with its vote and its cohesie.
+    """
+
+    zaak_info: dict[str, dict] = {}
+    for binding in zaken:
+        info = zaak_info.setdefault(binding['zaak']['value'], {
+            'nummer': binding['nummer']['value'],
+            'beschrijving': binding['beschrijving']['value'],
+            'datum': binding.get('datum', {}).get('value'),
+            'onderwerpen': set(),
+        })
+        if 'onderwerpType' in binding:
+            info['onderwerpen'].add(binding['onderwerpType']['value'])
+
+    # actor -> zaak -> the keuzes of the actor
+    keuzes: dict[str, dict[str, set[str]]] = {}
+    for binding in votes:
+        keuzes.setdefault(binding['actor']['value'], {}).setdefault(
+            binding['zaak']['value'], set(),
+        ).add(binding['keuze']['value'])
+
+    actor_votes: dict[str, list[tuple[str, str, str]]] = {
+        'fractie': [], 'persoon': [],
+    }
+    for binding in votes:
+        actor_votes[binding['soort']['value']].append((
+            binding['actor']['value'],
+            binding['keuze']['value'],
+            binding['zaak']['value'],
+        ))
+    # A persoon that changed fractie counts for the first one
+    fractie_van: dict[str, str] = {}
+    for binding in leden:
+        fractie_van.setdefault(
+            binding['persoon']['value'], binding['fractie']['value'],
+        )
+    cohesie = {}
+    for stats in compute_cohesie(
+        actor_votes['fractie'], actor_votes['persoon'], fractie_van,
+    ):
+        cohesie.update(stats)
+
+    profielen = {}
+    for actor in keuzes.keys() | cohesie.keys():
+        actor_keuzes = keuzes.get(actor, {})
+        onderwerp_votes: dict[str, dict[str, int]] = {}
+        recent_zaken = []
+        for zaak, zaak_keuzes in actor_keuzes.items():
+            if zaak not in zaak_info:
+                continue
+            info = zaak_info[zaak]
+
+            for onderwerp in info['onderwerpen']:
+                counts = onderwerp_votes.setdefault(
+                    onderwerp, dict.fromkeys(VOTE_LABELS, 0),
+                )
+                for keuze in zaak_keuzes:
+                    counts[keuze] += 1
+
+            recent_zaken.append({
+                'nummer': info['nummer'],
+                'beschrijving': info['beschrijving'],
+                'datum': info['datum'],
+                'vote': next(
+                    label for keuze, label in VOTE_LABELS.items()
+                    if keuze in zaak_keuzes
+                ),
+            })
+
+        recent_zaken.sort(key=lambda zaak: zaak['nummer'])
+        recent_zaken.sort(key=_recent_key, reverse=True)
+        profielen[actor] = {
+            'onderwerp_votes': dict(sorted(onderwerp_votes.items())),
+            'recent_zaken': recent_zaken[:RECENT_ZAKEN],
+            'cohesie': cohesie.get(actor),
+        }
+    return profielen
+
+
+def build_profielen_update(profielen: dict) -> str:
+    """Build a SPARQL UPDATE that replaces the profielen of all actoren."""
+
+    triples = '\n'.join(
+        f'    {URIRef(actor).n3()} {TK.profiel.n3()} '
+        + Literal(
+            json.dumps(profiel, ensure_ascii=False, sort_keys=True),
+            datatype=XSD.string,
+        ).n3()
+        + ' .'
+        for actor, profiel in profielen.items()
+    )
+    return (
+        f'DELETE WHERE {{ ?actor {TK.profiel.n3()} ?profiel }} ;\n'
+        f'INSERT DATA {{\n{triples}\n}}'
+    )
+
+
+def update_profielen(graphdb_url: str) -> bool:
+    """
+    Recompute the profielen of all actoren from the data in GraphDB.
+    Returns whether they were updated.
+    """
+
+    query_url, statements_url = repository_urls(graphdb_url)
+
+    try:
+        profielen = compute_profielen(
+            sparql_query(query_url, ZAKEN_QUERY),
+            sparql_query(query_url, VOTES_QUERY),
+            sparql_query(query_url, LEDEN_QUERY),
+        )
+        response = requests.post(
+            statements_url,
+            data=build_profielen_update(profielen).encode('utf-8'),
+            headers={'Content-Type': 'application/sparql-update'},
+        )
+        response.raise_for_status()
+    except RequestException as e:
+        logging.error(f'Error updating the profielen: {e}')
+        return False
+
+    logging.info(f'Updated the profielen of {len(profielen)} actoren.')
+    return True
+
+
+def main() -> int:
+
+    logging.basicConfig(level=logging.INFO)
+
+    args = create_arg_parser()
+
+    if not update_profielen(args.graphdb_url):
+        return 1
+
+    # Let the app know that the data changed
+    _, statements_url = repository_urls(args.graphdb_url)
+    try:
+        response = requests.post(
+            statements_url,
+            data=build_data_version_update().encode('utf-8'),
+            headers={'Content-Type': 'application/sparql-update'},
+        )
+        response.raise_for_status()
+    except RequestException as e:
+        logging.error(f'Error updating the data version in GraphDB: {e}')
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+import classifier
+from models import OnderwerpType
+from tkapi import TKApi
+
+# All requests that tkapi makes go through `TKApi._request_json`, so by
+# replacing that method every response can be captured to disk once and
+# replayed later without network access. The topic classifications are
+# captured as well, so a replayed run produces exactly the same zaken.
+
+CLASSIFICATIONS_FILE = 'classifications.jsonl'
+
+# The unpatched implementations, used to record and to restore
+_request_json = TKApi.__dict__['_request_json']
+_classify_text = classifier.classify_text
+
+
+class ReplayMissError(KeyError):
+    """Raised when a request is replayed that was never recorded."""
+
+
+def request_key(url: str, params: Optional[dict], max_items=None) -> str:
+    """A stable key for an API request."""
+
+    url = url.strip()
+    if TKApi.api_root.strip().lower() not in url.lower():
+        url = TKApi.api_root + url
+
+    normalized = json.dumps(
+        [url, sorted((params or {}).items()), max_items],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def _response_path(directory: str, key: str) -> str:
+    return os.path.join(directory, key[:2], f'{key}.json.gz')
+
+
+def _load_classifications(directory: str) -> dict[str, Optional[str]]:
+    path = os.path.join(directory, CLASSIFICATIONS_FILE)
+    if not os.path.exists(path):
+        return {}
+
+    classifications = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            text, value = json.loads(line)
+            classifications[text] = value
+    return classifications
+
+
+def record(directory: str) -> None:
+    """Make all API requests and classifications be saved to `directory`."""
+
+    os.makedirs(directory, exist_ok=True)
+
+    def request_json(cls, url, params=None, max_items=None):
+        # The original implementation adds to params, so take the key first
+        key = request_key(url, params, max_items)
+        response = _request_json.__func__(cls, url, params, max_items)
+
+        path = _response_path(directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump({'url': url, 'response': response}, f)
+
+        return response
+
+    def classify_text(text, *args, **kwargs):
+        onderwerp_type = _classify_text(text, *args, **kwargs)
+        value = onderwerp_type.value if onderwerp_type else None
+
+        with open(
+            os.path.join(directory, CLASSIFICATIONS_FILE), 'a',
+            encoding='utf-8',
+        ) as f:
+            f.write(json.dumps([text, value], ensure_ascii=False) + '\n')
+
+        return onderwerp_type
+
+    TKApi._request_json = classmethod(request_json)
+    classifier.classify_text = classify_text
+    logging.info(f'Recording TK API responses to {directory}')
+
+
+def replay(directory: str) -> None:
+    """Answer all API requests and classifications from `directory`."""
+
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f'No recorded API responses in {directory}')
+
+    classifications = _load_classifications(directory)
+
+    def request_json(cls, url, params=None, max_items=None):
+        path = _response_path(directory, request_key(url, params, max_items))
+        if not os.path.exists(path):
+            raise ReplayMissError(f'No recorded response for {url}')
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)['response']
+
+    def classify_text(text, *args, **kwargs):
+        # A recorded None is a text that could not be classified
+        if text not in classifications:
+            raise ReplayMissError(f'No recorded classification for {text}')
+        value = classifications[text]
+        return OnderwerpType(value) if value else None
+
+    TKApi._request_json = classmethod(request_json)
+    classifier.classify_text = classify_text
+    logging.info(f'Replaying TK API responses from {directory}')
+
+
+def restore() -> None:
+    """Undo `record` or `replay`."""
+
+    TKApi._request_json = _request_json
+    classifier.classify_text = _classify_text
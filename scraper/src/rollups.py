@@ -0,0 +1,260 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+
+import requests
+from models import TK
+from rdflib import Literal
+from rdflib import XSD
+from requests.exceptions import RequestException
+from sync import build_data_version_update
+
+# The index page of the app shows counts per month, which it would have
+# to compute over the whole graph on every request. Instead the scraper
+# keeps a tk:MaandOverzicht per month with those counts, and recomputes
+# the months it uploaded zaken for.
+
+PREFIXES = """
+PREFIX tk: <http://www.semanticweb.org/twanh/ontologies/2025/9/tk/>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
+
+# The zaken that were submitted in a month
+MONTH_PATTERN = """
+    ?zaak a tk:Zaak ;
+          tk:indieningsDatum ?datum .
+    FILTER (?datum >= "{start}"^^xsd:date && ?datum < "{end}"^^xsd:date)
+"""
+
+# name in the overzicht -> (query, the keys of a count)
+ROLLUP_QUERIES = {
+    'zaken_per_soort': (
+        """
+        SELECT ?zaakSoort (COUNT(DISTINCT ?zaak) AS ?aantal)
+        WHERE {{
+            {month}
+            ?zaak tk:zaakSoort ?zaakSoort .
+        }}
+        GROUP BY ?zaakSoort
+        """,
+        ['zaakSoort'],
+    ),
+    'zaken_per_onderwerp': (
+        """
+        SELECT ?onderwerpType (COUNT(DISTINCT ?zaak) AS ?aantal)
+        WHERE {{
+            {month}
+            ?zaak tk:heeftOnderwerp ?onderwerp .
+            ?onderwerp tk:onderwerpType ?onderwerpType .
+        }}
+        GROUP BY ?onderwerpType
+        """,
+        ['onderwerpType'],
+    ),
+    'stemmen_per_fractie': (
+        """
+        SELECT ?afkorting ?stemSoort (COUNT(?zaak) AS ?aantal)
+        WHERE {{
+            {month}
+            VALUES (?voteProperty ?stemSoort) {{
+                (tk:heeftVoorGestemd "Voor")
+                (tk:heeftTegenGestemd "Tegen")
+                (tk:heeftNietDeelgenomen "Niet Deelgenomen")
+            }}
+            ?fractie ?voteProperty ?zaak ;
+                     a tk:Fractie ;
+                     tk:afkorting ?afkorting .
+        }}
+        GROUP BY ?afkorting ?stemSoort
+        """,
+        ['afkorting', 'stemSoort'],
+    ),
+    'resultaat_per_onderwerp': (
+        """
+        SELECT ?onderwerpType ?resultaat (COUNT(DISTINCT ?zaak) AS ?aantal)
+        WHERE {{
+            {month}
+            ?zaak tk:besluitResultaat ?resultaat ;
+                  tk:heeftOnderwerp ?onderwerp .
+            ?onderwerp tk:onderwerpType ?onderwerpType .
+        }}
+        GROUP BY ?onderwerpType ?resultaat
+        """,
+        ['onderwerpType', 'resultaat'],
+    ),
+}
+
+MONTHS_QUERY = """
+SELECT DISTINCT ?jaar ?maand WHERE {
+    ?zaak a tk:Zaak ;
+          tk:indieningsDatum ?datum .
+    BIND (YEAR(?datum) AS ?jaar)
+    BIND (MONTH(?datum) AS ?maand)
+}
+"""
+
+
+def create_arg_parser():
+    """
+    Create the argument parser for the script.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=(
+            'Recompute the monthly rollups that the index page of the app '
+            'shows, for all months with zaken.'
+        ),
+    )
+    parser.add_argument(
+        '--graphdb-url',
+        type=str,
+        default=os.environ.get(
+            'GRAPHDB_URL',
+            'http://localhost:7200/repositories/tk_kb/statements',
+        ),
+        help='The URL of the GraphDB instance.',
+    )
+
+    return parser.parse_args()
+
+
+def repository_urls(graphdb_url: str) -> tuple[str, str]:
+    """The query and the statements (update) URL of the repository."""
+
+    statements_url = graphdb_url.rstrip('/')
+    if not statements_url.endswith('/statements'):
+        statements_url += '/statements'
+    return statements_url.removesuffix('/statements'), statements_url
+
+
+def sparql_query(url: str, query: str) -> list[dict]:
+    """The bindings of a SELECT query, with the tk and xsd prefixes."""
+
+    response = requests.post(
+        url,
+        data={'query': PREFIXES + query},
+        headers={'Accept': 'application/sparql-results+json'},
+    )
+    response.raise_for_status()
+    return response.json()['results']['bindings']
+
+
+def rollup_uri(year: int, month: int):
+    return TK[f'maandoverzicht/{year:04d}-{month:02d}']
+
+
+def compute_rollup(query_url: str, year: int, month: int) -> dict:
+    """
+    The counts of a month: zaken per soort and per onderwerp, votes per
+    fractie and keuze and besluit resultaten per onderwerp.
+    """
+
+    start = datetime.date(year, month, 1)
+    end = datetime.date(year + month // 12, month % 12 + 1, 1)
+    month_pattern = MONTH_PATTERN.format(start=start, end=end)
+
+    overzicht = {}
+    for name, (query, keys) in ROLLUP_QUERIES.items():
+        counts: dict = {}
+        query = query.format(month=month_pattern)
+        for binding in sparql_query(query_url, query):
+            # Nested by key, e.g. {afkorting: {stemSoort: aantal}}
+            level = counts
+            for key in keys[:-1]:
+                level = level.setdefault(binding[key]['value'], {})
+            level[binding[keys[-1]]['value']] = int(
+                binding['aantal']['value'],
+            )
+        overzicht[name] = counts
+    return overzicht
+
+
+def build_rollup_update(year: int, month: int, overzicht: dict) -> str:
+    """Build a SPARQL UPDATE that replaces the rollup of a month."""
+
+    uri = rollup_uri(year, month).n3()
+    data = Literal(
+        json.dumps(overzicht, ensure_ascii=False, sort_keys=True),
+        datatype=XSD.string,
+    ).n3()
+
+    return (
+        f'DELETE WHERE {{ {uri} ?p ?o }} ;\n'
+        f'INSERT DATA {{\n'
+        f'    {uri} a {TK.MaandOverzicht.n3()} ;\n'
+        f'        {TK.jaar.n3()} {Literal(year).n3()} ;\n'
+        f'        {TK.maand.n3()} {Literal(month).n3()} ;\n'
+        f'        {TK.overzicht.n3()} {data} .\n'
+        f'}}'
+    )
+
+
+def update_rollups(graphdb_url: str, months: set[tuple[int, int]]) -> bool:
+    """
+    Recompute the rollups of the given (year, month)s from the data in
+    GraphDB. Returns whether all of them were updated.
+    """
+
+    query_url, statements_url = repository_urls(graphdb_url)
+
+    for year, month in sorted(months):
+        try:
+            overzicht = compute_rollup(query_url, year, month)
+            response = requests.post(
+                statements_url,
+                data=build_rollup_update(year, month, overzicht).encode(
+                    'utf-8',
+                ),
+                headers={'Content-Type': 'application/sparql-update'},
+            )
+            response.raise_for_status()
+        except RequestException as e:
+            logging.error(
+                f'Error updating the rollup of {year}-{month:02d}: {e}',
+            )
+            return False
+
+    logging.info(f'Updated the rollups of {len(months)} months.')
+    return True
+
+
+def main() -> int:
+
+    logging.basicConfig(level=logging.INFO)
+
+    args = create_arg_parser()
+
+    query_url, _ = repository_urls(args.graphdb_url)
+    try:
+        months = {
+            (int(b['jaar']['value']), int(b['maand']['value']))
+            for b in sparql_query(query_url, MONTHS_QUERY)
+        }
+    except RequestException as e:
+        logging.error(f'Error fetching the months with zaken: {e}')
+        return 1
+
+    if not update_rollups(args.graphdb_url, months):
+        return 1
+
+    # Let the app know that the data changed
+    _, statements_url = repository_urls(args.graphdb_url)
+    try:
+        response = requests.post(
+            statements_url,
+            data=build_data_version_update().encode('utf-8'),
+            headers={'Content-Type': 'application/sparql-update'},
+        )
+        response.raise_for_status()
+    except RequestException as e:
+        logging.error(f'Error updating the data version in GraphDB: {e}')
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+
+    raise SystemExit(main())
@@ -1,13 +1,16 @@
 import datetime
 import logging
 
-from classifier import classify_text
+import classifier
+from models import ActorTable
 from models import Fractie as FractieModel
+from models import intern_str
 from models import Onderwerp
 from models import OnderwerpType
 from models import Persoon as PersoonModel
 from models import Stemming as StemmingModel
 from models import StemmingKeuze
+from models import StemmingResultaten
 from models import Zaak as ZaakModel
 from models import ZaakSoort as ZaakSoortEnum
 from tkapi import TKApi
@@ -35,6 +38,8 @@ class TkScraper:
         self._fracties: dict[str, FractieModel] = {}
         self._personen: dict[str, PersoonModel] = {}
         self._onderwerpen: dict[OnderwerpType, Onderwerp] = {}
+        # Shared by the results of all stemmingen
+        self._actoren = ActorTable()
 
     def get_all_fracties(
         self,
@@ -100,8 +105,10 @@ class TkScraper:
                             + lid.persoon.achternaam
                         ),
                         geboortedatum=lid.persoon.geboortedatum,
-                        geboorteplaats=lid.persoon.geboorteplaats,
-                        geslacht=lid.persoon.geslacht,
+                        geboorteplaats=intern_str(
+                            lid.persoon.geboorteplaats,
+                        ),
+                        geslacht=intern_str(lid.persoon.geslacht),
                         is_lid_van=fractie_model,
                     )
 
@@ -154,7 +161,9 @@ class TkScraper:
                 onderwerp_classification = OnderwerpType.Other
             else:
                 # Classify the zaak onderwerp
-                onderwerp_classification = classify_text(zaak.onderwerp)
+                onderwerp_classification = classifier.classify_text(
+                    zaak.onderwerp,
+                )
 
                 if onderwerp_classification is None:
                     self.logger.warning(
@@ -177,7 +186,9 @@ class TkScraper:
             zaak_model = ZaakModel(
                 uuid=zaak.id,
                 nummer=zaak.nummer,
-                dossier_nummer=zaak.dossier.nummer if zaak.dossier else None,
+                dossier_nummer=intern_str(
+                    zaak.dossier.nummer if zaak.dossier else None,
+                ),
                 volgnummer=zaak.volgnummer,
                 beschrijving=zaak.onderwerp,
                 indienings_datum=zaak.gestart_op,
@@ -200,14 +211,18 @@ class TkScraper:
             if zaak.besluiten:
 
                 for besluit in zaak.besluiten:
-                    zaak_model.besluit_resultaat = besluit.soort
-                    zaak_model.besluit_stemming_soort = besluit.stemming_soort
+                    # These values repeat for many zaken, so share them
+                    zaak_model.besluit_resultaat = intern_str(besluit.soort)
+                    zaak_model.besluit_stemming_soort = intern_str(
+                        besluit.stemming_soort,
+                    )
 
                     stemming_model = StemmingModel(
                         uuid=besluit.id,
-                        soort=besluit.stemming_soort,  # e.g., "Hoofdelijk"
+                        # e.g., "Hoofdelijk"
+                        soort=zaak_model.besluit_stemming_soort,
                         is_stemming_over=zaak_model,
-                        resultaten=[],
+                        resultaten=StemmingResultaten(self._actoren),
                     )
 
                     for stem in besluit.stemmingen:
@@ -245,8 +260,10 @@ class TkScraper:
                                         + stem.persoon.achternaam
                                     ),
                                     geboortedatum=stem.persoon.geboortedatum,
-                                    geboorteplaats=stem.persoon.geboorteplaats,
-                                    geslacht=stem.persoon.geslacht,
+                                    geboorteplaats=intern_str(
+                                        stem.persoon.geboorteplaats,
+                                    ),
+                                    geslacht=intern_str(stem.persoon.geslacht),
                                     # TODO: Perhaps fetch fractie?
                                     # is_lid_van=stem.persoon.fracties,
                                 )
@@ -0,0 +1,211 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timezone
+from typing import Optional
+
+from models import TK
+from rdflib import Graph
+from rdflib import Literal
+from rdflib import RDF
+from rdflib import XSD
+
+SNAPSHOT_VERSION = 1
+
+# Number of changed entities that are sent to GraphDB in a single update
+UPDATE_BATCH_SIZE = 500
+
+
+@dataclass
+class EntityChange:
+    """The difference between the synced and scraped triples of an entity."""
+
+    uri: str
+    digest: str
+    triples: list[str]
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def _ntriple(s, p, o) -> str:
+    return f'{s.n3()} {p.n3()} {o.n3()} .'
+
+
+def group_triples(g: Graph) -> dict[str, set[str]]:
+    """
+    Group the triples of a graph by the entity that owns them.
+
+    Every triple belongs to its subject, except for the triples that are
+    generated while converting a zaak: the stemmingen of a zaak, the votes
+    cast on it (:heeftVoorGestemd etc.) and the inverse :heeftZaak link all
+    belong to the zaak. This way an entity always contains exactly the
+    triples that are generated together, even when the subject is an
+    actor or onderwerp that also shows up in other zaken.
+    """
+
+    zaken = set(g.subjects(RDF.type, TK.Zaak))
+    stemming_zaak = dict(g.subject_objects(TK.isStemmingOver))
+
+    entities: dict[str, set[str]] = {}
+    for s, p, o in g:
+        if s in stemming_zaak:
+            owner = stemming_zaak[s]
+        elif o in zaken and s not in zaken:
+            owner = o
+        else:
+            owner = s
+
+        entities.setdefault(str(owner), set()).add(_ntriple(s, p, o))
+
+    return entities
+
+
+def entity_digest(triples: list[str]) -> str:
+    """A short, order independent digest of the triples of an entity."""
+
+    h = hashlib.blake2b(digest_size=16)
+    for triple in triples:
+        h.update(triple.encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+class SyncSnapshot:
+    """
+    The triples that were last uploaded to GraphDB, grouped per entity.
+
+    For every entity a digest is kept so unchanged entities are skipped
+    without comparing their triples, together with the triples themselves
+    so that values that are no longer scraped can be deleted again.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entities: dict[str, tuple[str, list[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    @classmethod
+    def load(cls, path: str) -> 'SyncSnapshot':
+        """Load the snapshot from disk, or start empty if there is none."""
+
+        snapshot = cls(path)
+        if not os.path.exists(path):
+            logging.info(f'No sync snapshot found at {path}, starting empty')
+            return snapshot
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('version') != SNAPSHOT_VERSION:
+            logging.warning(
+                f'Ignoring sync snapshot {path} with unknown version '
+                f'{data.get("version")}',
+            )
+            return snapshot
+
+        snapshot._entities = {
+            uri: (digest, triples)
+            for uri, (digest, triples) in data['entities'].items()
+        }
+        logging.info(f'Loaded sync snapshot with {len(snapshot)} entities')
+        return snapshot
+
+    def save(self) -> None:
+        """Write the snapshot to disk (atomically replacing the old one)."""
+
+        if self.path is None:
+            return
+
+        tmp_path = f'{self.path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(
+                {'version': SNAPSHOT_VERSION, 'entities': self._entities},
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def diff(self, g: Graph) -> list[EntityChange]:
+        """
+        Compare the entities in `g` to the snapshot.
+
+        Only entities whose triples changed are returned. Entities that are
+        in the snapshot but not in `g` are left alone, since a scrape only
+        covers a part of the data.
+        """
+
+        changes = []
+        for uri, triple_set in group_triples(g).items():
+            triples = sorted(triple_set)
+            digest = entity_digest(triples)
+
+            synced = self._entities.get(uri)
+            if synced is None:
+                changes.append(
+                    EntityChange(uri, digest, triples, added=triples),
+                )
+                continue
+
+            synced_digest, synced_triples = synced
+            if synced_digest == digest:
+                continue
+
+            synced_set = set(synced_triples)
+            changes.append(
+                EntityChange(
+                    uri,
+                    digest,
+                    triples,
+                    added=[t for t in triples if t not in synced_set],
+                    removed=[t for t in synced_triples if t not in triple_set],
+                ),
+            )
+
+        return changes
+
+    def apply(self, changes: list[EntityChange]) -> None:
+        """Mark the given changes as uploaded."""
+
+        for change in changes:
+            self._entities[change.uri] = (change.digest, change.triples)
+
+
+def build_update(changes: list[EntityChange]) -> str:
+    """Build a SPARQL UPDATE that applies the given changes."""
+
+    removed = [t for change in changes for t in change.removed]
+    added = [t for change in changes for t in change.added]
+
+    operations = []
+    if removed:
+        operations.append(
+            'DELETE DATA {\n' + '\n'.join(removed) + '\n}',
+        )
+    if added:
+        operations.append(
+            'INSERT DATA {\n' + '\n'.join(added) + '\n}',
+        )
+
+    return ' ;\n'.join(operations)
+
+
+def build_data_version_update(version: Optional[datetime] = None) -> str:
+    """
+    Build a SPARQL UPDATE that sets tk:dataVersion to `version` (default:
+    now). The app compares this value to find out that the data changed.
+    """
+
+    if version is None:
+        version = datetime.now(timezone.utc)
+    literal = Literal(version.isoformat(), datatype=XSD.dateTime).n3()
+
+    return (
+        f'DELETE WHERE {{ {TK.dataset.n3()} {TK.dataVersion.n3()} ?v }} ;\n'
+        f'INSERT DATA {{ {TK.dataset.n3()} {TK.dataVersion.n3()} {literal} }}'
+    )
@@ -0,0 +1,248 @@
+import argparse
+import datetime
+import email.utils
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from rollups import repository_urls
+from rollups import sparql_query
+
+# After an upload the first visitor of every page would wait for its
+# queries, so the scraper visits the pages itself: the overview pages,
+# all fracties and personen and the most recent zaken. That fills the
+# caches of the app (and of any proxy in front of it).
+
+# The pages that are always visited, and the data of their charts
+OVERVIEW_PAGES = [
+    '/', '/agreement', '/fracties', '/zaken',
+    '/data/zaken-per-type', '/data/topics-per-month', '/data/vote-behaviour',
+    '/data/acceptance', '/data/agreement-trend', '/data/agreement-per-topic',
+]
+
+FRACTIES_QUERY = """
+SELECT DISTINCT ?naam WHERE { ?fractie a tk:Fractie ; tk:naam ?naam . }
+ORDER BY ?naam
+"""
+
+PERSONEN_QUERY = """
+SELECT DISTINCT ?naam WHERE { ?persoon a tk:Persoon ; tk:naam ?naam . }
+ORDER BY ?naam
+"""
+
+RECENT_ZAKEN_QUERY = """
+SELECT ?nummer WHERE {{
+    ?zaak a tk:Zaak ;
+          tk:nummer ?nummer ;
+          tk:indieningsDatum ?datum .
+}}
+ORDER BY DESC(?datum) ?nummer
+LIMIT {limit}
+"""
+
+# How long to wait until the app sees the new data version, it checks
+# every 30 seconds by default
+VERSION_TIMEOUT = 120
+VERSION_POLL_INTERVAL = 5
+
+# How long a page may take
+PAGE_TIMEOUT = 300
+
+
+def create_arg_parser():
+    """
+    Create the argument parser for the script.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=(
+            'Visit the pages of the app for all fracties, personen and the '
+            'most recent zaken, so their caches are warm.'
+        ),
+    )
+    parser.add_argument(
+        '--graphdb-url',
+        type=str,
+        default=os.environ.get(
+            'GRAPHDB_URL',
+            'http://localhost:7200/repositories/tk_kb/statements',
+        ),
+        help='The URL of the GraphDB instance.',
+    )
+    parser.add_argument(
+        '--app-url',
+        type=str,
+        default=os.environ.get('APP_URL', 'http://localhost:5001'),
+        help='The URL of the app.',
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='The number of pages to visit at the same time.',
+    )
+    parser.add_argument(
+        '--recent-zaken',
+        type=int,
+        default=200,
+        help='The number of most recent zaken to visit.',
+    )
+
+    return parser.parse_args()
+
+
+def warm_up_pages(query_url: str, recent_zaken: int) -> list[str]:
+    """The paths of the pages to visit."""
+
+    fracties = sparql_query(query_url, FRACTIES_QUERY)
+    personen = sparql_query(query_url, PERSONEN_QUERY)
+    zaken = sparql_query(
+        query_url, RECENT_ZAKEN_QUERY.format(limit=recent_zaken),
+    )
+
+    return OVERVIEW_PAGES + [
+        f'/fractie/{quote(b["naam"]["value"], safe="")}' for b in fracties
+    ] + [
+        f'/persoon/{quote(b["naam"]["value"], safe="")}' for b in personen
+    ] + [
+        f'/zaak/{quote(b["nummer"]["value"], safe="")}' for b in zaken
+    ]
+
+
+def wait_for_version(app_url: str, version: datetime.datetime) -> bool:
+    """
+    Wait until the app serves the data of `version` (its Last-Modified).
+    Returns whether it does.
+    """
+
+    version = version.replace(microsecond=0)
+    deadline = time.monotonic() + VERSION_TIMEOUT
+    while True:
+        try:
+            response = requests.head(app_url + '/fracties', timeout=30)
+            last_modified = response.headers.get('Last-Modified')
+            if (
+                last_modified
+                and email.utils.parsedate_to_datetime(last_modified)
+                >= version
+            ):
+                return True
+        except RequestException as e:
+            logging.warning(f'Error checking the data version of the app: {e}')
+
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(VERSION_POLL_INTERVAL)
+
+
+def _visit(session: requests.Session, url: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    try:
+        status = session.get(url, timeout=PAGE_TIMEOUT).status_code
+    except RequestException as e:
+        logging.warning(f'Error visiting {url}: {e}')
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def _percentile(durations: list[float], percentile: float) -> float:
+    durations = sorted(durations)
+    return durations[min(
+        len(durations) - 1, int(len(durations) * percentile / 100),
+    )]
+
+
+def report(results: list[tuple[str, int, float]], duration: float) -> None:
+    """Log how long the pages took, per kind of page."""
+
+    kinds: dict[str, list[float]] = {}
+    for path, _, seconds in results:
+        kind = path.split('/')[1] if path.count('/') > 1 else 'overzicht'
+        kinds.setdefault(kind, []).append(seconds)
+
+    failed = [path for path, status, _ in results if status != 200]
+    logging.info(
+        f'Warmed up {len(results)} pages in {duration:.1f}s '
+        f'({len(failed)} failed).',
+    )
+    for kind, durations in kinds.items():
+        logging.info(
+            f'  {kind}: {len(durations)} pages, '
+            f'mean {sum(durations) / len(durations):.2f}s, '
+            f'p95 {_percentile(durations, 95):.2f}s, '
+            f'max {max(durations):.2f}s',
+        )
+    for path, _, seconds in sorted(results, key=lambda r: -r[2])[:5]:
+        logging.info(f'  slowest: {path} ({seconds:.2f}s)')
+    for path in failed:
+        logging.warning(f'  failed: {path}')
+
+
+def warm_up_app(
+    graphdb_url: str,
+    app_url: str,
+    version: Optional[datetime.datetime] = None,
+    concurrency: int = 4,
+    recent_zaken: int = 200,
+) -> bool:
+    """
+    Visit the pages of the app, at most `concurrency` at a time. With the
+    `version` that was just uploaded, first wait until the app serves it.
+    Returns whether all pages could be visited.
+    """
+
+    app_url = app_url.rstrip('/')
+    query_url, _ = repository_urls(graphdb_url)
+
+    try:
+        pages = warm_up_pages(query_url, recent_zaken)
+    except RequestException as e:
+        logging.error(f'Error fetching the pages to warm up: {e}')
+        return False
+
+    if version is not None and not wait_for_version(app_url, version):
+        logging.warning('The app does not serve the new data (yet).')
+
+    start = time.perf_counter()
+    with requests.Session() as session, ThreadPoolExecutor(
+        max_workers=concurrency,
+    ) as executor:
+        session.mount(app_url, HTTPAdapter(pool_maxsize=concurrency))
+        visits = executor.map(
+            lambda path: _visit(session, app_url + path), pages,
+        )
+        results = [
+            (path, status, seconds)
+            for path, (status, seconds) in zip(pages, visits)
+        ]
+    report(results, time.perf_counter() - start)
+
+    return all(status == 200 for _, status, _ in results)
+
+
+def main() -> int:
+
+    logging.basicConfig(level=logging.INFO)
+
+    args = create_arg_parser()
+
+    if not warm_up_app(
+        args.graphdb_url,
+        args.app_url,
+        concurrency=args.concurrency,
+        recent_zaken=args.recent_zaken,
+    ):
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+
+    raise SystemExit(main())